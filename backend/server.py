@@ -1,26 +1,206 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, CursorType, IndexModel, ReturnDocument, UpdateOne, monitoring
+from bson.int64 import Int64
+from pymongo.read_preferences import Nearest, PrimaryPreferred, ReadPreference, Secondary, SecondaryPreferred
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError, OperationFailure, PyMongoError
 import os
+import gzip
+import hashlib
+import json
+import sys
 import logging
+import mmap
+import signal
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
+import numpy as np
 from passlib.context import CryptContext
 import asyncio
+import contextvars
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Settings
+# Every field can be overridden by the environment variable of the same name in upper case
+# (MONGO_MAX_POOL_SIZE=50, LOOP_STALL_THRESHOLD_MS=500, ...).
+class Settings(BaseModel):
+    mongo_url: str = 'mongodb://localhost:27017'
+    db_name: str = 'disaster_preparedness'
+    cors_origins: str = '*'
+    # Tenant (school or district) for data created before tenants existed and for the seed
+    default_tenant_id: str = 'default'
+    # Connection pool and driver options
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    mongo_server_selection_timeout_ms: int = 30000
+    mongo_connect_timeout_ms: int = 20000
+    mongo_socket_timeout_ms: Optional[int] = None
+    mongo_compressors: Optional[str] = None  # e.g. "zstd,snappy"; needs zstandard / python-snappy
+    mongo_read_preference: str = 'primary'
+    # Diagnostics
+    profiler_max_seconds: float = 60
+    loop_watchdog_enabled: bool = True
+    loop_watchdog_interval_ms: float = 100
+    loop_stall_threshold_ms: float = 250
+    memory_request_budget_mb: float = 0  # 0 disables the sampler
+    memory_sampler_interval_seconds: float = 300
+    memory_sampler_window_seconds: float = 30
+    memory_trace_frames: int = 10
+    # Admission control: "route=max_concurrent:max_queued" pairs, comma separated
+    admission_limits: str = '/api/auth/login=8:64,/api/predict-disaster=4:32'
+    admission_default_limit: Optional[str] = None  # "max_concurrent:max_queued" for all other routes
+    admission_exempt_routes: str = '/api/alerts,/api/emergency-contacts,/api/emergency-bundle,/api/emergency-bundle/{version},/api/health/live,/api/health/ready'
+    admission_queue_timeout_ms: float = 2000
+    admission_retry_after_seconds: int = 1
+    # Priority lanes: routes not listed below run in the "interactive" lane
+    lane_critical_routes: str = '/api/alerts,/api/alerts/{alert_id},/api/emergency-contacts,/api/emergency-contacts/{contact_id},/api/emergency-bundle,/api/emergency-bundle/{version}'
+    lane_analytics_routes: str = '/api/teacher/students-progress,/api/admin/teachers-progress,/api/leaderboard,/api/predictions,/api/user-stats/{user_id},/api/drills/report,/api/teacher/quizzes/{quiz_id}/item-analysis'
+    lane_limits: str = 'critical=64:512,interactive=128:512,analytics=8:64'  # "lane=max_concurrent:max_queued"
+    lane_pool_sizes: str = 'critical=10,analytics=20'  # dedicated Mongo pool per lane; others share the main client
+    # Dashboards that tolerate stale data read from secondaries; everything else, including
+    # auth lookups, reads from the primary. MongoDB requires max staleness >= 90 seconds.
+    secondary_read_routes: str = '/api/teacher/students-progress,/api/admin/teachers-progress,/api/leaderboard,/api/predictions,/api/drills/report,/api/teacher/quizzes/{quiz_id}/item-analysis'
+    secondary_read_preference: str = 'secondaryPreferred'
+    secondary_max_staleness_seconds: int = 90
+    # Dashboard response cache: "endpoint=fresh_seconds:stale_seconds"
+    cache_ttls: str = 'leaderboard=15:60,students-progress=30:120,teachers-progress=60:300,modules=300:0,quizzes=300:0,emergency-contacts=300:0,alerts=60:0,emergency-bundle=300:0'
+    # Cross-worker cache invalidation: "capped" (tailable cursor, works on a standalone mongod),
+    # "changestream" (replica sets) or "local" (single worker, no broadcast)
+    invalidation_backend: str = 'capped'
+    invalidation_max_delay_ms: int = 500
+    invalidation_collection_size_bytes: int = 1024 * 1024
+    # Background report jobs
+    report_workers: int = 2
+    report_queue_size: int = 32
+    report_result_ttl_seconds: int = 600
+    # Local snapshot of contacts, active alerts and modules for when MongoDB is slow or down;
+    # an empty SNAPSHOT_PATH disables it
+    snapshot_path: str = str(ROOT_DIR / 'local_snapshot.json')
+    snapshot_refresh_seconds: float = 300
+    snapshot_db_deadline_ms: float = 1500
+    # Drill check-ins are buffered and written with insert_many once a batch fills or
+    # DRILL_CHECKIN_FLUSH_MS passes; retries with the same key within the window are replayed
+    drill_checkin_batch_size: int = 500
+    drill_checkin_flush_ms: float = 50
+    drill_checkin_dedupe_seconds: float = 600
+    drill_checkin_key_retention_days: float = 7  # how long other workers can still replay a key
+    batch_max_requests: int = 20
+    # Delta sync: changes stamped within this window are re-sent on the next sync
+    sync_settle_seconds: float = 5
+    # Longest an alert can stay active past its expires_at; the sweeper also wakes up for
+    # the next known expiry
+    alert_sweep_interval_seconds: float = 30
+    # Predictions older than PREDICTION_RETENTION_DAYS move to disaster_predictions_archive,
+    # which keeps them for PREDICTION_ARCHIVE_DAYS; 0 keeps them forever in either place
+    prediction_retention_days: float = 90
+    prediction_archive_days: float = 0
+    prediction_retention_interval_seconds: float = 3600
+    item_analysis_chunk_size: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(**{name: os.environ[name.upper()] for name in cls.model_fields if name.upper() in os.environ})
+
+    def mongo_client_options(self) -> dict:
+        options = {
+            "maxPoolSize": self.mongo_max_pool_size,
+            "minPoolSize": self.mongo_min_pool_size,
+            "maxIdleTimeMS": self.mongo_max_idle_time_ms,
+            "waitQueueTimeoutMS": self.mongo_wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+            "connectTimeoutMS": self.mongo_connect_timeout_ms,
+            "socketTimeoutMS": self.mongo_socket_timeout_ms,
+            "compressors": self.mongo_compressors,
+            "readPreference": self.mongo_read_preference
+        }
+        return {k: v for k, v in options.items() if v is not None}
+
+settings = Settings.from_env()
+
 # MongoDB connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'disaster_preparedness')]
+# The client is opened and closed by the app lifespan; handlers go through this proxy so
+# they never hold on to a client from a previous lifespan.
+READ_PREFERENCE_MODES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest
+}
+
+def secondary_read_preference(app_settings: Settings):
+    if app_settings.secondary_read_preference == "primary":
+        return None
+    if app_settings.secondary_read_preference not in READ_PREFERENCE_MODES:
+        raise ValueError(f"Unknown SECONDARY_READ_PREFERENCE {app_settings.secondary_read_preference!r}")
+    mode = READ_PREFERENCE_MODES[app_settings.secondary_read_preference]
+    return mode(max_staleness=app_settings.secondary_max_staleness_seconds)
+
+class DatabaseProxy:
+    def __init__(self):
+        self._database = None
+        self._lane_databases = {}
+        self._secondary_databases = {}
+        self._primary_databases = {}
+
+    def bind(self, database, lane_databases: Optional[dict] = None, secondary_preference=None):
+        self._database = database
+        self._lane_databases = {None: database, **(lane_databases or {})}
+        self._secondary_databases = {
+            lane: lane_database.with_options(read_preference=secondary_preference) if secondary_preference else lane_database
+            for lane, lane_database in self._lane_databases.items()
+        }
+        self._primary_databases = {
+            lane: lane_database.with_options(read_preference=ReadPreference.PRIMARY)
+            for lane, lane_database in self._lane_databases.items()
+        }
+
+    def _lane(self):
+        if self._database is None:
+            raise RuntimeError("Database is not connected; is the app lifespan running?")
+        # Requests in a lane with a dedicated pool use that lane's client
+        lane = request_lane.get()
+        return lane if lane in self._lane_databases else None
+
+    def __getattr__(self, name):
+        lane = self._lane()
+        databases = self._secondary_databases if request_reads_secondary.get() else self._lane_databases
+        return getattr(databases[lane], name)
+
+    @property
+    def primary(self):
+        # For reads that must see the latest writes (auth) even on secondary-read routes
+        return self._primary_databases[self._lane()]
+
+    def __getitem__(self, name):
+        return self.__getattr__(name)
+
+request_lane = contextvars.ContextVar("request_lane", default=None)
+request_reads_secondary = contextvars.ContextVar("request_reads_secondary", default=False)
+batch_authenticated_user = contextvars.ContextVar("batch_authenticated_user", default=None)
+client = None
+lane_clients = {}
+running_app = None  # the app whose lifespan owns the clients above
+db = DatabaseProxy()
 
 # Security
 SECRET_KEY = "disaster_preparedness_secret_key_2024"
@@ -30,15 +210,96 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
-# Create the main app without a prefix
-app = FastAPI(title="Disaster Preparedness System")
-
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Metrics
+# In-process registry rendered in the Prometheus text format by /api/admin/metrics.
+# Values may be updated from worker threads (watchdog, driver callbacks), hence the lock.
+class Metric:
+    def __init__(self, name: str, kind: str, help_text: str, buckets=None):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.buckets = sorted(buckets) if buckets else None
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = value
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @staticmethod
+    def _labels(pairs) -> str:
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in self.values.items():
+                if self.kind != "histogram":
+                    lines.append(f"{self.name}{self._labels(key)} {value}")
+                    continue
+                for bound, count in zip(self.buckets, value["buckets"]):
+                    lines.append(f"{self.name}_bucket{self._labels(key + (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{self._labels(key + (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {value['sum']}")
+                lines.append(f"{self.name}_count{self._labels(key)} {value['count']}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _get(self, name, kind, help_text, buckets=None):
+        if name not in self._metrics:
+            self._metrics[name] = Metric(name, kind, help_text, buckets)
+        return self._metrics[name]
+
+    def counter(self, name: str, help_text: str) -> Metric:
+        return self._get(name, "counter", help_text)
+
+    def gauge(self, name: str, help_text: str) -> Metric:
+        return self._get(name, "gauge", help_text)
+
+    def histogram(self, name: str, help_text: str, buckets) -> Metric:
+        return self._get(name, "histogram", help_text, buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
 # Pydantic Models
+def default_tenant_id() -> str:
+    return settings.default_tenant_id
+
 class UserBase(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     username: str
     email: str
     full_name: str
@@ -51,6 +312,7 @@ class UserCreate(BaseModel):
     full_name: str
     password: str
     role: str
+    tenant_id: Optional[str] = None  # only admins of the default tenant may create users elsewhere
 
 class UserLogin(BaseModel):
     username: str
@@ -69,6 +331,7 @@ class Token(BaseModel):
 
 class Module(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     title: str
     description: str
     video_url: str
@@ -78,6 +341,7 @@ class Module(BaseModel):
 
 class VideoCompletion(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     user_id: Optional[str] = None
     module_id: str
     completed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -85,14 +349,25 @@ class VideoCompletion(BaseModel):
 
 class Quiz(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     title: str
     module_id: str  # Associated module, empty string for standalone quizzes
     questions: List[dict]
     created_by: Optional[str] = None  # ID of teacher/admin who created the quiz
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class QuizSummary(BaseModel):
+    id: str
+    title: str
+    module_id: str
+    question_count: int
+    created_by: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
 class QuizAttempt(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     user_id: Optional[str] = None
     quiz_id: str
     module_id: str  # Associated module
@@ -103,23 +378,28 @@ class QuizAttempt(BaseModel):
 
 class DrillParticipation(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     user_id: Optional[str] = None
+    drill_id: Optional[str] = None
     drill_type: str
     participated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     notes: Optional[str] = None
 
 class Alert(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     title: str
     message: str
     alert_type: str  # fire, earthquake, flood, etc.
     severity: str    # low, medium, high, critical
     active: bool = True
+    expires_at: Optional[datetime] = None  # deactivated by the expiry sweeper once passed
     created_by: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class EmergencyContact(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     name: str
     phone: str
     type: str  # police, fire, ambulance, disaster
@@ -128,6 +408,7 @@ class EmergencyContact(BaseModel):
 
 class DisasterPrediction(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
     city: str
     risk_percentage: float
     disaster_types: List[str]
@@ -153,6 +434,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # Sub-requests of a batch reuse the user the batch itself authenticated
+    batch_auth = batch_authenticated_user.get()
+    if batch_auth is not None and batch_auth[0] == credentials.credentials:
+        return batch_auth[1]
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -166,233 +452,763 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.PyJWTError:
         raise credentials_exception
     
-    user = await db.users.find_one({"username": username})
+    user = await db.primary.users.find_one({"username": username})
     if user is None:
         raise credentials_exception
     return User(**user)
 
-# Initialize default data
-async def initialize_default_data():
-    # Check if admin exists
-    admin = await db.users.find_one({"role": "admin"})
-    if not admin:
-        # Create default admin
-        admin_user = UserInDB(
-            username="admin",
-            email="admin@school.edu",
-            full_name="System Administrator",
-            role="admin",
-            hashed_password=get_password_hash("admin123")
+# Seed Data
+# Bump SEED_VERSION whenever the manifest changes. Startup compares it with the marker stored
+# in db.meta, so a warm start costs a single find_one and only a cold or outdated database
+# pays for password hashing and the bulk upserts. Upserts match on natural keys and only
+# $setOnInsert, so re-applying the manifest never overwrites documents edited by admins.
+SEED_VERSION = 1
+
+SEED_MANIFEST = {
+    "users": [
+        {"username": "admin", "email": "admin@school.edu", "full_name": "System Administrator", "role": "admin", "password": "admin123"},
+        {"username": "teacher1", "email": "teacher@school.edu", "full_name": "John Teacher", "role": "teacher", "password": "teacher123"},
+        {"username": "student1", "email": "student@school.edu", "full_name": "Jane Student", "role": "student", "password": "student123"}
+    ],
+    "emergency_contacts": [
+        {"name": "Police", "phone": "911", "type": "police", "description": "Emergency Police Services"},
+        {"name": "Fire Department", "phone": "911", "type": "fire", "description": "Fire Emergency Services"},
+        {"name": "Ambulance", "phone": "911", "type": "ambulance", "description": "Medical Emergency Services"},
+        {"name": "Disaster Helpline", "phone": "1-800-DISASTER", "type": "disaster", "description": "Disaster Response Helpline"}
+    ],
+    # Modules with YouTube videos
+    "modules": [
+        {
+            "title": "Fire Safety",
+            "description": "Learn essential fire safety procedures, evacuation techniques, and prevention methods to protect yourself and others during fire emergencies.",
+            "video_url": "https://youtu.be/ReL-DM9xhpI?si=tDeWcsHd4mK1yEAv",
+            "video_duration": 8,
+            "order": 1
+        },
+        {
+            "title": "Earthquake Response", 
+            "description": "Master the Drop, Cover, and Hold On technique and learn essential earthquake safety measures and post-earthquake procedures.",
+            "video_url": "https://youtu.be/BLEPakj1YTY?si=h61YmR5yZQfYxapW",
+            "video_duration": 7,
+            "order": 2
+        },
+        {
+            "title": "Flood Preparedness",
+            "description": "Understand flood risks, evacuation procedures, water safety protocols, and how to prepare for flood emergencies.",
+            "video_url": "https://youtu.be/43M5mZuzHF8?si=t7_jYxbItFkDFfnT",
+            "video_duration": 6,
+            "order": 3
+        },
+        {
+            "title": "Emergency Kits",
+            "description": "Learn what essential supplies to include in emergency kits for your home, school, and workplace to be prepared for any disaster.",
+            "video_url": "https://youtu.be/UmiGvOha7As?si=fX8Ns_F_Nya2gseu",
+            "video_duration": 9,
+            "order": 4
+        }
+    ],
+    # Module-specific quizzes, linked to their module by title
+    "quizzes": [
+        {
+            "title": "Fire Safety Quiz",
+            "module": "Fire Safety",
+            "questions": [
+                {
+                    "question": "What should you do first when you discover a fire?",
+                    "options": ["Try to put it out yourself", "Alert others and activate fire alarm", "Gather your belongings", "Take photos for insurance"],
+                    "correct": 1
+                },
+                {
+                    "question": "When escaping from a fire, you should:",
+                    "options": ["Stand upright and run quickly", "Stay low and crawl below smoke", "Use the elevator for quick escape", "Stop to help others first"],
+                    "correct": 1
+                },
+                {
+                    "question": "Before opening a door during a fire emergency, you should:",
+                    "options": ["Open it quickly to escape fast", "Feel the door handle and door for heat", "Knock to see if anyone is behind it", "Break it down if it's locked"],
+                    "correct": 1
+                },
+                {
+                    "question": "If your clothes catch fire, you should:",
+                    "options": ["Run to get help", "Stop, Drop, and Roll", "Jump into water immediately", "Use your hands to pat out flames"],
+                    "correct": 1
+                },
+                {
+                    "question": "How often should smoke detector batteries be checked?",
+                    "options": ["Once a year", "Every 6 months", "Once a month", "Only when they beep"],
+                    "correct": 2
+                }
+            ]
+        },
+        {
+            "title": "Earthquake Response Quiz",
+            "module": "Earthquake Response",
+            "questions": [
+                {
+                    "question": "What is the correct response when you feel earthquake shaking?",
+                    "options": ["Run outside immediately", "Stand in a doorway", "Drop, Cover, and Hold On", "Get under a bed"],
+                    "correct": 2
+                },
+                {
+                    "question": "During an earthquake, the safest place to take cover is:",
+                    "options": ["Under a sturdy desk or table", "In a doorway", "Near a window", "Under stairs"],
+                    "correct": 0
+                },
+                {
+                    "question": "How long should you hold your protective position during earthquake shaking?",
+                    "options": ["Until counting to 10", "Until the shaking stops completely", "For exactly 30 seconds", "Until you hear the all-clear signal"],
+                    "correct": 1
+                },
+                {
+                    "question": "After an earthquake stops, you should:",
+                    "options": ["Immediately run outside", "Check for injuries and hazards first", "Turn on all lights", "Use the phone to call everyone"],
+                    "correct": 1
+                },
+                {
+                    "question": "If you're driving during an earthquake, you should:",
+                    "options": ["Speed up to get home quickly", "Stop immediately wherever you are", "Pull over safely and stay in the car", "Get out and lie on the ground"],
+                    "correct": 2
+                }
+            ]
+        },
+        {
+            "title": "Flood Preparedness Quiz", 
+            "module": "Flood Preparedness",
+            "questions": [
+                {
+                    "question": "What is the most important rule about walking in flood water?",
+                    "options": ["Only walk if water is clear", "Never walk in moving water", "Walk quickly to minimize exposure", "Always walk with a group"],
+                    "correct": 1
+                },
+                {
+                    "question": "How much moving water can knock down an adult?",
+                    "options": ["12 inches", "6 inches", "18 inches", "24 inches"],
+                    "correct": 1
+                },
+                {
+                    "question": "If you encounter a flooded road while driving, you should:",
+                    "options": ["Drive through quickly", "Test the depth slowly", "Turn around and find another route", "Wait for other cars to go first"],
+                    "correct": 2
+                },
+                {
+                    "question": "When preparing for a flood, which action should you take first?",
+                    "options": ["Move to higher ground", "Gather important documents", "Fill bathtubs with water", "Board up windows"],
+                    "correct": 0
+                },
+                {
+                    "question": "After a flood, before entering your home you should:",
+                    "options": ["Rush in to assess damage", "Check for structural damage and hazards", "Turn on electricity to see better", "Start cleaning immediately"],
+                    "correct": 1
+                }
+            ]
+        },
+        {
+            "title": "Emergency Kits Quiz",
+            "module": "Emergency Kits",
+            "questions": [
+                {
+                    "question": "How much water should you store per person per day in an emergency kit?",
+                    "options": ["1/2 gallon", "1 gallon", "2 gallons", "3 gallons"],
+                    "correct": 1
+                },
+                {
+                    "question": "Emergency food supplies should last for at least:",
+                    "options": ["24 hours", "48 hours", "72 hours (3 days)", "1 week"],
+                    "correct": 2
+                },
+                {
+                    "question": "Which of these is NOT essential in a basic emergency kit?",
+                    "options": ["First aid kit", "Matches in waterproof container", "Laptop computer", "Battery-powered radio"],
+                    "correct": 2
+                },
+                {
+                    "question": "How often should you check and update your emergency kit?",
+                    "options": ["Once a year", "Every 6 months", "Every 3 months", "Only when items expire"],
+                    "correct": 1
+                },
+                {
+                    "question": "The best location for your home emergency kit is:",
+                    "options": ["In the basement", "In a cool, dry, easily accessible place", "In the garage", "In the attic"],
+                    "correct": 1
+                }
+            ]
+        }
+    ]
+}
+
+readiness = {"seeded": False, "indexes": False}
+
+# Seeded documents carry seeded: True, and a partial unique index on their natural key makes
+# concurrent cold starts insert each one once; the losing upsert fails with a duplicate key
+# error that seed_bulk_write ignores. Documents created by teachers are not constrained.
+SEED_FLAG = {"seeded": True}
+
+async def seed_bulk_write(collection, ops):
+    try:
+        await collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as exc:
+        if any(error.get("code") != 11000 for error in exc.details.get("writeErrors", [])):
+            raise
+
+async def apply_seed_manifest(tenant_id: str, include_users: bool = True):
+    # Users: only hash passwords for accounts that are actually missing. Usernames are global,
+    # so the seed accounts only ever exist in the default tenant.
+    if include_users:
+        usernames = [u["username"] for u in SEED_MANIFEST["users"]]
+        existing = {u["username"] for u in await db.users.find({"username": {"$in": usernames}}, {"username": 1}).to_list(length=None)}
+        user_ops = []
+        for seed_user in SEED_MANIFEST["users"]:
+            if seed_user["username"] in existing:
+                continue
+            hashed_password = await asyncio.to_thread(get_password_hash, seed_user["password"])
+            user = UserInDB(**{k: v for k, v in seed_user.items() if k != "password"}, tenant_id=tenant_id, hashed_password=hashed_password)
+            user_ops.append(UpdateOne({"username": user.username}, {"$setOnInsert": user.dict()}, upsert=True))
+        if user_ops:
+            await seed_bulk_write(db.users, user_ops)
+    
+    contact_ops = [
+        UpdateOne(
+            {"tenant_id": tenant_id, "name": c["name"], "type": c["type"]},
+            {"$setOnInsert": {**EmergencyContact(**c, tenant_id=tenant_id).dict(), **SEED_FLAG}},
+            upsert=True
         )
-        await db.users.insert_one(admin_user.dict())
-        
-        # Create default teacher
-        teacher_user = UserInDB(
-            username="teacher1",
-            email="teacher@school.edu", 
-            full_name="John Teacher",
-            role="teacher",
-            hashed_password=get_password_hash("teacher123")
+        for c in SEED_MANIFEST["emergency_contacts"]
+    ]
+    await seed_bulk_write(db.emergency_contacts, contact_ops)
+    
+    module_ops = [
+        UpdateOne({"tenant_id": tenant_id, "title": m["title"]}, {"$setOnInsert": {**Module(**m, tenant_id=tenant_id).dict(), **SEED_FLAG}}, upsert=True)
+        for m in SEED_MANIFEST["modules"]
+    ]
+    await seed_bulk_write(db.modules, module_ops)
+    
+    # Resolve module ids after the upserts so quizzes also link up on databases seeded earlier
+    module_titles = [m["title"] for m in SEED_MANIFEST["modules"]]
+    modules = await db.modules.find({"tenant_id": tenant_id, "title": {"$in": module_titles}}, {"id": 1, "title": 1}).to_list(length=None)
+    module_ids = {m["title"]: m["id"] for m in modules}
+    quiz_ops = []
+    for seed_quiz in SEED_MANIFEST["quizzes"]:
+        quiz = Quiz(
+            tenant_id=tenant_id,
+            title=seed_quiz["title"],
+            module_id=module_ids[seed_quiz["module"]],
+            questions=seed_quiz["questions"]
         )
-        await db.users.insert_one(teacher_user.dict())
-        
-        # Create default student
-        student_user = UserInDB(
-            username="student1",
-            email="student@school.edu",
-            full_name="Jane Student", 
-            role="student",
-            hashed_password=get_password_hash("student123")
+        quiz_ops.append(UpdateOne(
+            {"tenant_id": tenant_id, "title": quiz.title, "module_id": quiz.module_id},
+            {"$setOnInsert": {**quiz.dict(), **SEED_FLAG}},
+            upsert=True
+        ))
+    await seed_bulk_write(db.quizzes, quiz_ops)
+
+async def initialize_default_data():
+    marker = await db.meta.find_one({"_id": "seed"})
+    if marker and marker.get("version", 0) >= SEED_VERSION:
+        return
+    
+    # Databases seeded before the manifest existed have an admin but no marker. Keep the old
+    # "seed only an empty database" behaviour for them instead of re-adding deleted defaults.
+    if marker or not await db.users.find_one({"role": "admin"}, {"_id": 1}):
+        await apply_seed_manifest(settings.default_tenant_id)
+        await invalidation_bus.publish("modules", "quizzes", "emergency_contacts")
+        logger.info("Applied seed manifest version %s", SEED_VERSION)
+    
+    await db.meta.update_one(
+        {"_id": "seed"},
+        {"$set": {"version": SEED_VERSION, "applied_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+async def backfill_once(name: str, backfill):
+    # Backfills scan for unindexed missing fields, so they get a marker like the seed and
+    # rerun only when the manifest version changes (a new manifest adds documents to cover)
+    marker = await db.meta.find_one({"_id": f"backfill:{name}"})
+    if marker and marker.get("version", 0) >= SEED_VERSION:
+        return
+    await backfill()
+    await db.meta.update_one(
+        {"_id": f"backfill:{name}"},
+        {"$set": {"version": SEED_VERSION, "applied_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+# Every tenant-owned collection; indexes lead with tenant_id so each one is also a valid
+# prefix for a {tenant_id: 1, ...} shard key later on. drill_participations keeps its
+# tenant in meta.tenant_id and is backfilled by migrate_drill_participations. Exceptions:
+# users stays unsharded because usernames are unique across tenants (login has no tenant),
+# and TTL indexes plus the retention and expiry sweep indexes are single-field by nature;
+# they are not unique, so they don't constrain a shard key.
+TENANT_COLLECTIONS = (
+    "users", "modules", "quizzes", "quiz_attempts", "video_completions",
+    "drill_counters", "alerts", "emergency_contacts", "disaster_predictions", "latest_predictions", "classes",
+    "sync_tombstones", "report_jobs"
+)
+
+async def backfill_tenant_ids():
+    # Documents written before tenants existed belong to the default tenant; runs once through
+    # backfill_once since tenant_id: {$exists: false} has no index to use
+    for name in TENANT_COLLECTIONS:
+        if await db[name].find_one({"tenant_id": {"$exists": False}}, {"_id": 1}):
+            await db[name].update_many({"tenant_id": {"$exists": False}}, {"$set": {"tenant_id": settings.default_tenant_id}})
+
+# Indexes replaced by tenant-prefixed or partial ones
+LEGACY_INDEXES = {
+    "users": ["id_1"],
+    "alerts": ["tenant_id_1_active_1"],
+    "classes": ["id_1"],
+    "report_jobs": ["id_1", "cache_key_1_created_at_1"]
+}
+
+async def ensure_indexes():
+    for name, indexes in LEGACY_INDEXES.items():
+        for index in indexes:
+            try:
+                await db[name].drop_index(index)
+            except OperationFailure:
+                pass
+    await db.users.create_indexes([
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("tenant_id", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("role", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("receipt_id", ASCENDING)])
+    ])
+    await db.modules.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("order", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("sync_seq", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("title", ASCENDING)], name="seed_natural_key", unique=True, partialFilterExpression=SEED_FLAG)
+    ])
+    await db.quizzes.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("module_id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("created_by", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("sync_seq", ASCENDING)]),
+        IndexModel(
+            [("tenant_id", ASCENDING), ("title", ASCENDING), ("module_id", ASCENDING)],
+            name="seed_natural_key", unique=True, partialFilterExpression=SEED_FLAG
         )
-        await db.users.insert_one(student_user.dict())
-        
-        # Create default emergency contacts
-        contacts = [
-            {"name": "Police", "phone": "911", "type": "police", "description": "Emergency Police Services"},
-            {"name": "Fire Department", "phone": "911", "type": "fire", "description": "Fire Emergency Services"},
-            {"name": "Ambulance", "phone": "911", "type": "ambulance", "description": "Medical Emergency Services"},
-            {"name": "Disaster Helpline", "phone": "1-800-DISASTER", "type": "disaster", "description": "Disaster Response Helpline"}
-        ]
-        
-        for contact_data in contacts:
-            contact = EmergencyContact(**contact_data)
-            await db.emergency_contacts.insert_one(contact.dict())
+    ])
+    await db.quiz_attempts.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("user_id", ASCENDING), ("module_id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("quiz_id", ASCENDING), ("_id", ASCENDING)])
+    ])
+    await db.video_completions.create_index([("tenant_id", ASCENDING), ("user_id", ASCENDING), ("module_id", ASCENDING)])
+    await db.drill_participations.create_index(
+        [("meta.tenant_id", ASCENDING), ("meta.user_id", ASCENDING), ("participated_at", ASCENDING)]
+    )
+    await db.drill_checkin_keys.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+    await db.drill_counters.create_index([("tenant_id", ASCENDING), ("drill_id", ASCENDING)], unique=True)
+    # Only live alerts are indexed for the hot "active alerts" queries and the expiry sweep
+    await db.alerts.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("created_at", ASCENDING)], name="live_alerts", partialFilterExpression={"active": True}),
+        IndexModel([("expires_at", ASCENDING)], name="live_alert_expiry", partialFilterExpression={"active": True}),
+        IndexModel([("tenant_id", ASCENDING), ("created_by", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("sync_seq", ASCENDING)])
+    ])
+    await db.emergency_contacts.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("sync_seq", ASCENDING)]),
+        IndexModel(
+            [("tenant_id", ASCENDING), ("name", ASCENDING), ("type", ASCENDING)],
+            name="seed_natural_key", unique=True, partialFilterExpression=SEED_FLAG
+        )
+    ])
+    # The first index serves the per-tenant "newest 50" query, the second the retention sweep
+    await db.disaster_predictions.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("predicted_at", ASCENDING)]),
+        IndexModel([("predicted_at", ASCENDING)])
+    ])
+    await db.disaster_predictions_archive.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("predicted_at", ASCENDING)]),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)
+    ])
+    await db.latest_predictions.create_index([("tenant_id", ASCENDING), ("city_key", ASCENDING)], unique=True)
+    await db.classes.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("id", ASCENDING)], unique=True),
+        IndexModel([("tenant_id", ASCENDING), ("teacher_id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("student_ids", ASCENDING)])
+    ])
+    await db.sync_tombstones.create_index([("tenant_id", ASCENDING), ("sync_seq", ASCENDING)])
+    await db.report_jobs.create_indexes([
+        IndexModel([("tenant_id", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("tenant_id", ASCENDING), ("cache_key", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)
+    ])
+
+# Index builds that fail on the data itself (duplicates under a unique index, a conflicting
+# existing index) fail the same way on every retry and need an operator
+INDEX_BUILD_FATAL_CODES = {11000, 85, 86}
+
+async def prepare_database():
+    # Runs in the background so the worker can answer liveness probes while Mongo comes up.
+    # Indexes come before the seed so its unique keys already hold when workers start together;
+    # the drill migration goes first since it has to create its collection as time-series.
+    delay = 1
+    while True:
+        try:
+            await migrate_drill_participations()
+            try:
+                await ensure_indexes()
+            except OperationFailure as exc:
+                if exc.code not in INDEX_BUILD_FATAL_CODES:
+                    raise
+                logger.critical("Index build failed and cannot succeed on retry, shutting down: %s", exc)
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            readiness["indexes"] = True
+            await backfill_once("tenant_ids", backfill_tenant_ids)
+            await initialize_default_data()
+            await backfill_once("sync_stamps", backfill_sync_stamps)
+            await backfill_once("receipt_ids", backfill_receipt_ids)
+            await backfill_latest_predictions()
+            readiness["seeded"] = True
+            logger.info("Indexes ensured and database seeded")
+            return
+        except Exception:
+            logger.exception("Database preparation failed, retrying in %s seconds", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+# Response Cache
+# Caches computed dashboard results per endpoint and role scope. Concurrent misses for the
+# same key share one computation (single flight), and for stale_seconds after expiry the
+# old value is served while a single background task recomputes it. Invalidating an endpoint
+# bumps its generation: computations already running then finish for their own callers but
+# neither store their result nor take new callers, since they may have read pre-write data.
+cache_requests_counter = metrics.counter("response_cache_requests_total", "Cache lookups by endpoint and outcome")
+cache_refresh_errors = metrics.counter("response_cache_refresh_errors_total", "Background refreshes that failed")
+
+class ResponseCache:
+    def __init__(self):
+        self._entries = {}  # key -> (value, fresh_until, stale_until)
+        self._in_flight = {}  # key -> Future shared by every caller waiting on that key
+        self._generations = Counter()  # endpoint -> invalidations so far, None counts for all
+        self._tasks = set()
+
+    def _generation(self, key):
+        return (self._generations[None], self._generations[key[0]])
+
+    def _ttls(self, endpoint: str):
+        return parse_pair_spec(settings.cache_ttls).get(endpoint, (0, 0))
+
+    def _start(self, endpoint: str, key, compute, background: bool = False):
+        # The computation runs in its own task so a disconnecting caller can't cancel it
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        generation = self._generation(key)
+
+        async def run():
+            try:
+                value = await compute()
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as exc:
+                if background:
+                    cache_refresh_errors.inc(endpoint=endpoint)
+                    logger.exception("Background refresh of %s failed", endpoint)
+                future.set_exception(exc)
+                future.exception()  # don't warn when no caller is waiting on a refresh
+            else:
+                if self._generation(key) == generation:
+                    fresh, stale = self._ttls(endpoint)
+                    now = time.monotonic()
+                    self._entries[key] = (value, now + fresh, now + fresh + stale)
+                future.set_result(value)
+            finally:
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return future
+
+    async def get_or_compute(self, endpoint: str, key, compute):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry[1]:
+            cache_requests_counter.inc(endpoint=endpoint, result="hit")
+            return entry[0]
         
-        # Create modules with YouTube videos
-        modules_data = [
-            {
-                "title": "Fire Safety",
-                "description": "Learn essential fire safety procedures, evacuation techniques, and prevention methods to protect yourself and others during fire emergencies.",
-                "video_url": "https://youtu.be/ReL-DM9xhpI?si=tDeWcsHd4mK1yEAv",
-                "video_duration": 8,
-                "order": 1
-            },
-            {
-                "title": "Earthquake Response", 
-                "description": "Master the Drop, Cover, and Hold On technique and learn essential earthquake safety measures and post-earthquake procedures.",
-                "video_url": "https://youtu.be/BLEPakj1YTY?si=h61YmR5yZQfYxapW",
-                "video_duration": 7,
-                "order": 2
-            },
-            {
-                "title": "Flood Preparedness",
-                "description": "Understand flood risks, evacuation procedures, water safety protocols, and how to prepare for flood emergencies.",
-                "video_url": "https://youtu.be/43M5mZuzHF8?si=t7_jYxbItFkDFfnT",
-                "video_duration": 6,
-                "order": 3
-            },
-            {
-                "title": "Emergency Kits",
-                "description": "Learn what essential supplies to include in emergency kits for your home, school, and workplace to be prepared for any disaster.",
-                "video_url": "https://youtu.be/UmiGvOha7As?si=fX8Ns_F_Nya2gseu",
-                "video_duration": 9,
-                "order": 4
-            }
-        ]
+        if entry is not None and now < entry[2]:
+            cache_requests_counter.inc(endpoint=endpoint, result="stale")
+            if key not in self._in_flight:
+                self._start(endpoint, key, compute, background=True)
+            return entry[0]
         
-        created_modules = []
-        for module_data in modules_data:
-            module = Module(**module_data)
-            await db.modules.insert_one(module.dict())
-            created_modules.append(module)
+        if key in self._in_flight:
+            cache_requests_counter.inc(endpoint=endpoint, result="coalesced")
+            return await asyncio.shield(self._in_flight[key])
         
-        # Create module-specific quizzes
-        quiz_data = [
-            {
-                "title": "Fire Safety Quiz",
-                "module_id": created_modules[0].id,
-                "questions": [
-                    {
-                        "question": "What should you do first when you discover a fire?",
-                        "options": ["Try to put it out yourself", "Alert others and activate fire alarm", "Gather your belongings", "Take photos for insurance"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "When escaping from a fire, you should:",
-                        "options": ["Stand upright and run quickly", "Stay low and crawl below smoke", "Use the elevator for quick escape", "Stop to help others first"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "Before opening a door during a fire emergency, you should:",
-                        "options": ["Open it quickly to escape fast", "Feel the door handle and door for heat", "Knock to see if anyone is behind it", "Break it down if it's locked"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "If your clothes catch fire, you should:",
-                        "options": ["Run to get help", "Stop, Drop, and Roll", "Jump into water immediately", "Use your hands to pat out flames"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "How often should smoke detector batteries be checked?",
-                        "options": ["Once a year", "Every 6 months", "Once a month", "Only when they beep"],
-                        "correct": 2
-                    }
-                ]
-            },
-            {
-                "title": "Earthquake Response Quiz",
-                "module_id": created_modules[1].id,
-                "questions": [
-                    {
-                        "question": "What is the correct response when you feel earthquake shaking?",
-                        "options": ["Run outside immediately", "Stand in a doorway", "Drop, Cover, and Hold On", "Get under a bed"],
-                        "correct": 2
-                    },
-                    {
-                        "question": "During an earthquake, the safest place to take cover is:",
-                        "options": ["Under a sturdy desk or table", "In a doorway", "Near a window", "Under stairs"],
-                        "correct": 0
-                    },
-                    {
-                        "question": "How long should you hold your protective position during earthquake shaking?",
-                        "options": ["Until counting to 10", "Until the shaking stops completely", "For exactly 30 seconds", "Until you hear the all-clear signal"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "After an earthquake stops, you should:",
-                        "options": ["Immediately run outside", "Check for injuries and hazards first", "Turn on all lights", "Use the phone to call everyone"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "If you're driving during an earthquake, you should:",
-                        "options": ["Speed up to get home quickly", "Stop immediately wherever you are", "Pull over safely and stay in the car", "Get out and lie on the ground"],
-                        "correct": 2
-                    }
-                ]
-            },
-            {
-                "title": "Flood Preparedness Quiz", 
-                "module_id": created_modules[2].id,
-                "questions": [
-                    {
-                        "question": "What is the most important rule about walking in flood water?",
-                        "options": ["Only walk if water is clear", "Never walk in moving water", "Walk quickly to minimize exposure", "Always walk with a group"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "How much moving water can knock down an adult?",
-                        "options": ["12 inches", "6 inches", "18 inches", "24 inches"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "If you encounter a flooded road while driving, you should:",
-                        "options": ["Drive through quickly", "Test the depth slowly", "Turn around and find another route", "Wait for other cars to go first"],
-                        "correct": 2
-                    },
-                    {
-                        "question": "When preparing for a flood, which action should you take first?",
-                        "options": ["Move to higher ground", "Gather important documents", "Fill bathtubs with water", "Board up windows"],
-                        "correct": 0
-                    },
-                    {
-                        "question": "After a flood, before entering your home you should:",
-                        "options": ["Rush in to assess damage", "Check for structural damage and hazards", "Turn on electricity to see better", "Start cleaning immediately"],
-                        "correct": 1
-                    }
-                ]
-            },
-            {
-                "title": "Emergency Kits Quiz",
-                "module_id": created_modules[3].id,
-                "questions": [
-                    {
-                        "question": "How much water should you store per person per day in an emergency kit?",
-                        "options": ["1/2 gallon", "1 gallon", "2 gallons", "3 gallons"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "Emergency food supplies should last for at least:",
-                        "options": ["24 hours", "48 hours", "72 hours (3 days)", "1 week"],
-                        "correct": 2
-                    },
-                    {
-                        "question": "Which of these is NOT essential in a basic emergency kit?",
-                        "options": ["First aid kit", "Matches in waterproof container", "Laptop computer", "Battery-powered radio"],
-                        "correct": 2
-                    },
-                    {
-                        "question": "How often should you check and update your emergency kit?",
-                        "options": ["Once a year", "Every 6 months", "Every 3 months", "Only when items expire"],
-                        "correct": 1
-                    },
-                    {
-                        "question": "The best location for your home emergency kit is:",
-                        "options": ["In the basement", "In a cool, dry, easily accessible place", "In the garage", "In the attic"],
-                        "correct": 1
-                    }
-                ]
-            }
+        cache_requests_counter.inc(endpoint=endpoint, result="miss")
+        return await asyncio.shield(self._start(endpoint, key, compute))
+
+    def invalidate(self, endpoint: Optional[str] = None):
+        self._generations[endpoint] += 1
+        for store in (self._entries, self._in_flight):
+            for key in list(store):
+                if endpoint is None or key[0] == endpoint:
+                    del store[key]
+
+response_cache = ResponseCache()
+
+# Cache Invalidation Bus
+# Writers publish a topic after committing; every worker drops the matching cache entries.
+# Versions come from one counter, so a worker that already applied a newer invalidation for
+# a topic ignores older ones arriving late. With the capped backend each worker tails
+# db.cache_invalidations with an awaitable cursor, so delivery takes at most about
+# INVALIDATION_MAX_DELAY_MS and the source collections are never polled.
+invalidations_counter = metrics.counter("cache_invalidations_total", "Invalidations applied by topic and origin")
+
+class InvalidationBus:
+    def __init__(self):
+        self.origin = str(uuid.uuid4())
+        self.backend = "local"
+        self.max_delay_ms = 500
+        self._subscribers = {}  # topic -> [callback]
+        self._versions = {}  # topic -> newest applied version
+        self._task = None
+
+    def subscribe(self, topic: str, callback):
+        self._subscribers.setdefault(topic, []).append(callback)
+
+    def _apply(self, message: dict):
+        topic = message["topic"]
+        if message["version"] <= self._versions.get(topic, 0):
+            return
+        self._versions[topic] = message["version"]
+        for callback in self._subscribers.get(topic, []):
+            callback()
+        invalidations_counter.inc(topic=topic, origin="local" if message["origin"] == self.origin else "remote")
+
+    async def publish(self, *topics: str):
+        counter = await db.counters.find_one_and_update(
+            {"_id": "cache_invalidation"},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        messages = [
+            {"topic": topic, "version": counter["seq"], "origin": self.origin, "published_at": datetime.now(timezone.utc)}
+            for topic in topics
         ]
-        
-        for quiz in quiz_data:
-            quiz_obj = Quiz(**quiz)
-            await db.quizzes.insert_one(quiz_obj.dict())
+        for message in messages:
+            self._apply(message)
+        if self.backend != "local":
+            await db.cache_invalidations.insert_many(messages)
+
+    async def _ensure_collection(self, size_bytes: int):
+        try:
+            await db.create_collection("cache_invalidations", capped=True, size=size_bytes)
+            # Tailable cursors die immediately on an empty capped collection
+            await db.cache_invalidations.insert_one({"topic": "", "version": 0, "origin": "", "published_at": datetime.now(timezone.utc)})
+        except CollectionInvalid:
+            pass
+
+    async def _tail_capped(self):
+        collection = db.cache_invalidations
+        newest = await collection.find_one(sort=[("$natural", -1)])
+        last_version = newest["version"] if newest else 0
+        while True:
+            cursor = collection.find(
+                {"version": {"$gt": last_version}},
+                cursor_type=CursorType.TAILABLE_AWAIT
+            ).max_await_time_ms(self.max_delay_ms)
+            while cursor.alive:
+                async for message in cursor:
+                    last_version = max(last_version, message["version"])
+                    self._apply(message)
+            await asyncio.sleep(self.max_delay_ms / 1000)
+
+    async def _watch_change_stream(self):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        async with db.cache_invalidations.watch(pipeline, max_await_time_ms=self.max_delay_ms) as stream:
+            async for change in stream:
+                self._apply(change["fullDocument"])
+
+    async def _run(self, size_bytes: int):
+        delay = 1
+        while True:
+            try:
+                if self.backend == "changestream":
+                    await self._watch_change_stream()
+                else:
+                    await self._ensure_collection(size_bytes)
+                    await self._tail_capped()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cache invalidation listener failed, reconnecting in %s seconds", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def start(self, backend: str, max_delay_ms: int, size_bytes: int):
+        self.backend = backend
+        self.max_delay_ms = max_delay_ms
+        if backend != "local":
+            self._task = asyncio.create_task(self._run(size_bytes))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+invalidation_bus = InvalidationBus()
+invalidation_bus.subscribe("modules", lambda: response_cache.invalidate("modules"))
+invalidation_bus.subscribe("quizzes", lambda: response_cache.invalidate("quizzes"))
+invalidation_bus.subscribe("emergency_contacts", lambda: response_cache.invalidate("emergency-contacts"))
+invalidation_bus.subscribe("alerts", lambda: response_cache.invalidate("alerts"))
+invalidation_bus.subscribe("emergency_contacts", lambda: response_cache.invalidate("emergency-bundle"))
+invalidation_bus.subscribe("alerts", lambda: response_cache.invalidate("emergency-bundle"))
+invalidation_bus.subscribe("classes", lambda: response_cache.invalidate("students-progress"))
+invalidation_bus.subscribe("classes", lambda: response_cache.invalidate("leaderboard"))
+
+# Local Snapshot
+# Emergency contacts, active alerts and the module catalog of every tenant are mirrored to
+# a JSON file on local disk, rewritten after writes (via the invalidation bus) and every
+# SNAPSHOT_REFRESH_SECONDS, and memory-mapped back in at startup. When MongoDB errors or
+# misses SNAPSHOT_DB_DEADLINE_MS, those endpoints answer from the snapshot instead and
+# report its age in X-Snapshot-Age.
+snapshot_fallbacks_counter = metrics.counter("snapshot_fallbacks_total", "Responses served from the local snapshot by dataset and reason")
+
+class LocalSnapshot:
+    def __init__(self):
+        self.path = None
+        self.tenants = {}  # tenant id -> dataset -> documents
+        self.written_at = None
+        self._refresh_requested = None
+        self._task = None
+
+    def load(self, path: Path):
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                snapshot = json.loads(mapped[:])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable snapshot %s", path, exc_info=True)
+            return
+        # A truncated or older-format snapshot is treated as missing rather than failing startup
+        if not isinstance(snapshot, dict):
+            snapshot = {}
+        written_at, tenants = snapshot.get("written_at"), snapshot.get("tenants")
+        valid = isinstance(written_at, (int, float)) and isinstance(tenants, dict)
+        if not valid or not all(isinstance(datasets, dict) for datasets in tenants.values()):
+            logger.warning("Ignoring malformed snapshot %s", path)
+            return
+        self.tenants = tenants
+        self.written_at = written_at
+
+    def _write(self, snapshot: dict):
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    async def refresh(self):
+        contacts, alerts, modules = await asyncio.gather(
+            db.emergency_contacts.find().to_list(length=None),
+            db.alerts.find({"active": True}).to_list(length=None),
+            db.modules.find().sort("order", 1).to_list(length=None)
+        )
+        datasets = {
+            "emergency_contacts": [EmergencyContact(**contact) for contact in contacts],
+            "alerts": [Alert(**alert) for alert in alerts],
+            "modules": [Module(**module) for module in modules]
+        }
+        tenants = {}
+        for name, documents in datasets.items():
+            for document in documents:
+                tenants.setdefault(document.tenant_id, {name: [] for name in datasets})[name].append(document)
+        tenants = jsonable_encoder(tenants)
+        written_at = time.time()
+        await asyncio.to_thread(self._write, {"written_at": written_at, "tenants": tenants})
+        self.tenants, self.written_at = tenants, written_at
+
+    def request_refresh(self):
+        if self._refresh_requested is not None:
+            self._refresh_requested.set()
+
+    async def _run(self, interval: float):
+        # An unseeded database would overwrite a good snapshot with empty lists
+        while not readiness["seeded"]:
+            await asyncio.sleep(1)
+        while True:
+            self._refresh_requested.clear()
+            try:
+                await self.refresh()
+            except Exception:
+                logger.warning("Refreshing the local snapshot failed", exc_info=True)
+            try:
+                await asyncio.wait_for(self._refresh_requested.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def serve(self, tenant_id: str, dataset: str, compute):
+        documents = self.tenants.get(tenant_id, {}).get(dataset)
+        if documents is None:
+            return await compute
+        try:
+            return await asyncio.wait_for(compute, settings.snapshot_db_deadline_ms / 1000)
+        except (asyncio.TimeoutError, PyMongoError) as exc:
+            snapshot_fallbacks_counter.inc(dataset=dataset, reason="timeout" if isinstance(exc, asyncio.TimeoutError) else "error")
+            return JSONResponse(documents, headers={"X-Snapshot-Age": str(int(time.time() - self.written_at))})
+
+    def start(self, path: str, interval: float):
+        if not path:
+            return
+        self.path = Path(path)
+        self.load(self.path)
+        self._refresh_requested = asyncio.Event()
+        self._task = asyncio.create_task(self._run(interval))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._refresh_requested = None
+
+local_snapshot = LocalSnapshot()
+for topic in ("modules", "emergency_contacts", "alerts"):
+    invalidation_bus.subscribe(topic, local_snapshot.request_refresh)
+
+async def get_current_tenant_or_degraded(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    # Snapshot-backed endpoints settle for a token we signed when the user lookup can't finish
+    try:
+        user = await asyncio.wait_for(get_current_user(credentials), settings.snapshot_db_deadline_ms / 1000)
+        return user.tenant_id
+    except (asyncio.TimeoutError, PyMongoError):
+        try:
+            payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return payload.get("tenant", settings.default_tenant_id)
+
+# Health Routes
+@api_router.get("/health/live")
+async def liveness_probe():
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+async def readiness_probe():
+    ready = all(readiness.values())
+    return JSONResponse(
+        status_code=200 if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"ready": ready, **readiness}
+    )
 
 # Authentication Routes
 @api_router.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin):
-    user = await db.users.find_one({"username": user_credentials.username})
-    if not user or not verify_password(user_credentials.password, user["hashed_password"]):
+    user = await db.primary.users.find_one({"username": user_credentials.username})
+    # bcrypt is CPU-bound; run it off the event loop so admission control bounds it per worker
+    if not user or not await asyncio.to_thread(verify_password, user_credentials.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -401,7 +1217,8 @@ async def login(user_credentials: UserLogin):
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
+        data={"sub": user["username"], "tenant": user.get("tenant_id", settings.default_tenant_id)},
+        expires_delta=access_token_expires
     )
     
     user_obj = User(**user)
@@ -417,7 +1234,7 @@ async def get_users(current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    users = await db.users.find().to_list(length=None)
+    users = await db.users.find({"tenant_id": current_user.tenant_id}).to_list(length=None)
     return [User(**user) for user in users]
 
 @api_router.post("/users", response_model=User)
@@ -425,28 +1242,47 @@ async def create_user(user: UserCreate, current_user: User = Depends(get_current
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Check if username already exists
+    # Admins of the default tenant onboard other schools by creating their first users
+    tenant_id = user.tenant_id or current_user.tenant_id
+    if tenant_id != current_user.tenant_id and current_user.tenant_id != settings.default_tenant_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    # Check if username already exists (usernames are unique across tenants)
     existing_user = await db.users.find_one({"username": user.username})
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already exists")
     
     user_in_db = UserInDB(
-        **user.dict(exclude={"password"}),
-        hashed_password=get_password_hash(user.password)
+        **user.dict(exclude={"password", "tenant_id"}),
+        tenant_id=tenant_id,
+        hashed_password=await asyncio.to_thread(get_password_hash, user.password)
     )
     
+    # A new tenant starts with the standard modules, quizzes and emergency contacts
+    new_tenant = not await db.users.find_one({"tenant_id": tenant_id}, {"_id": 1})
     await db.users.insert_one(user_in_db.dict())
+    await assign_receipt_ids(tenant_id)
+    if new_tenant:
+        await apply_seed_manifest(tenant_id, include_users=False)
+        await backfill_sync_stamps()
+        await invalidation_bus.publish("modules", "quizzes", "emergency_contacts")
     return User(**user_in_db.dict())
 
 # Module Routes
 @api_router.get("/modules", response_model=List[Module])
-async def get_modules(current_user: User = Depends(get_current_user)):
-    modules = await db.modules.find().sort("order", 1).to_list(length=None)
-    return [Module(**module) for module in modules]
+async def get_modules(tenant_id: str = Depends(get_current_tenant_or_degraded)):
+    async def load():
+        modules = await db.modules.find({"tenant_id": tenant_id}).sort("order", 1).to_list(length=None)
+        return [Module(**module) for module in modules]
+    return await local_snapshot.serve(
+        tenant_id,
+        "modules",
+        response_cache.get_or_compute("modules", ("modules", tenant_id, "all"), load)
+    )
 
 @api_router.get("/modules/{module_id}", response_model=Module)
 async def get_module(module_id: str, current_user: User = Depends(get_current_user)):
-    module = await db.modules.find_one({"id": module_id})
+    module = await db.modules.find_one({"tenant_id": current_user.tenant_id, "id": module_id})
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     return Module(**module)
@@ -455,9 +1291,11 @@ async def get_module(module_id: str, current_user: User = Depends(get_current_us
 @api_router.post("/video-completion", response_model=VideoCompletion)
 async def mark_video_complete(completion: VideoCompletion, current_user: User = Depends(get_current_user)):
     completion.user_id = current_user.id
+    completion.tenant_id = current_user.tenant_id
     
     # Check if already completed
     existing = await db.video_completions.find_one({
+        "tenant_id": current_user.tenant_id,
         "user_id": current_user.id,
         "module_id": completion.module_id
     })
@@ -465,7 +1303,7 @@ async def mark_video_complete(completion: VideoCompletion, current_user: User =
     if existing:
         # Update existing completion
         await db.video_completions.update_one(
-            {"user_id": current_user.id, "module_id": completion.module_id},
+            {"tenant_id": current_user.tenant_id, "user_id": current_user.id, "module_id": completion.module_id},
             {"$set": completion.dict()}
         )
     else:
@@ -477,6 +1315,7 @@ async def mark_video_complete(completion: VideoCompletion, current_user: User =
 @api_router.get("/video-completion/{module_id}")
 async def get_video_completion(module_id: str, current_user: User = Depends(get_current_user)):
     completion = await db.video_completions.find_one({
+        "tenant_id": current_user.tenant_id,
         "user_id": current_user.id,
         "module_id": module_id
     })
@@ -490,13 +1329,53 @@ async def get_video_completion(module_id: str, current_user: User = Depends(get_
 # Quiz Routes
 @api_router.get("/quizzes", response_model=List[Quiz])
 async def get_quizzes(current_user: User = Depends(get_current_user)):
-    quizzes = await db.quizzes.find().to_list(length=None)
-    return [Quiz(**quiz) for quiz in quizzes]
+    async def load():
+        quizzes = await db.quizzes.find({"tenant_id": current_user.tenant_id}).to_list(length=None)
+        return [Quiz(**quiz) for quiz in quizzes]
+    return await response_cache.get_or_compute("quizzes", ("quizzes", current_user.tenant_id, "all"), load)
+
+# Catalog listings leave the questions array on the server and only report how many there are
+QUIZ_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "title": 1,
+    "module_id": 1,
+    "created_by": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "question_count": {"$size": {"$ifNull": ["$questions", []]}}
+}
+
+async def load_quiz_summaries(query: dict) -> List[QuizSummary]:
+    summaries = await db.quizzes.aggregate([
+        {"$match": query},
+        {"$project": QUIZ_SUMMARY_PROJECTION}
+    ]).to_list(length=None)
+    return [QuizSummary(**summary) for summary in summaries]
+
+@api_router.get("/quizzes/summary", response_model=List[QuizSummary])
+async def get_quiz_summaries(current_user: User = Depends(get_current_user)):
+    return await response_cache.get_or_compute(
+        "quizzes",
+        ("quizzes", current_user.tenant_id, "summary"),
+        lambda: load_quiz_summaries({"tenant_id": current_user.tenant_id})
+    )
 
 @api_router.get("/quizzes/module/{module_id}", response_model=List[Quiz])
 async def get_module_quizzes(module_id: str, current_user: User = Depends(get_current_user)):
-    quizzes = await db.quizzes.find({"module_id": module_id}).to_list(length=None)
-    return [Quiz(**quiz) for quiz in quizzes]
+    async def load():
+        quizzes = await db.quizzes.find({"tenant_id": current_user.tenant_id, "module_id": module_id}).to_list(length=None)
+        return [Quiz(**quiz) for quiz in quizzes]
+    return await response_cache.get_or_compute("quizzes", ("quizzes", current_user.tenant_id, "module", module_id), load)
+
+@api_router.get("/quizzes/{quiz_id}", response_model=Quiz)
+async def get_quiz(quiz_id: str, current_user: User = Depends(get_current_user)):
+    async def load():
+        quiz = await db.quizzes.find_one({"tenant_id": current_user.tenant_id, "id": quiz_id})
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        return Quiz(**quiz)
+    return await response_cache.get_or_compute("quizzes", ("quizzes", current_user.tenant_id, "detail", quiz_id), load)
 
 # New Quiz Management Routes for Teachers
 class QuizCreate(BaseModel):
@@ -510,6 +1389,7 @@ async def create_quiz(quiz_data: QuizCreate, current_user: User = Depends(get_cu
         raise HTTPException(status_code=403, detail="Not authorized")
     
     quiz = Quiz(
+        tenant_id=current_user.tenant_id,
         title=quiz_data.title,
         module_id=quiz_data.module_id or "",
         questions=quiz_data.questions
@@ -517,8 +1397,10 @@ async def create_quiz(quiz_data: QuizCreate, current_user: User = Depends(get_cu
     # Add created_by field to track who created the quiz
     quiz_dict = quiz.dict()
     quiz_dict["created_by"] = current_user.id
+    quiz_dict.update(await sync_stamp())
     
     await db.quizzes.insert_one(quiz_dict)
+    await invalidation_bus.publish("quizzes")
     return quiz
 
 @api_router.get("/teacher/quizzes", response_model=List[Quiz])
@@ -528,19 +1410,29 @@ async def get_teacher_quizzes(current_user: User = Depends(get_current_user)):
     
     # Get quizzes created by current teacher or all if admin
     if current_user.role == "admin":
-        quizzes = await db.quizzes.find().to_list(length=None)
+        quizzes = await db.quizzes.find({"tenant_id": current_user.tenant_id}).to_list(length=None)
     else:
-        quizzes = await db.quizzes.find({"created_by": current_user.id}).to_list(length=None)
+        quizzes = await db.quizzes.find({"tenant_id": current_user.tenant_id, "created_by": current_user.id}).to_list(length=None)
     
     return [Quiz(**quiz) for quiz in quizzes]
 
+@api_router.get("/teacher/quizzes/summary", response_model=List[QuizSummary])
+async def get_teacher_quiz_summaries(current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    query = {"tenant_id": current_user.tenant_id}
+    if current_user.role != "admin":
+        query["created_by"] = current_user.id
+    return await load_quiz_summaries(query)
+
 @api_router.put("/teacher/quizzes/{quiz_id}", response_model=Quiz)
 async def update_quiz(quiz_id: str, quiz_data: QuizCreate, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
     # Check if quiz exists and user has permission
-    existing_quiz = await db.quizzes.find_one({"id": quiz_id})
+    existing_quiz = await db.quizzes.find_one({"tenant_id": current_user.tenant_id, "id": quiz_id})
     if not existing_quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
@@ -550,6 +1442,7 @@ async def update_quiz(quiz_id: str, quiz_data: QuizCreate, current_user: User =
     # Update quiz
     updated_quiz = Quiz(
         id=quiz_id,
+        tenant_id=current_user.tenant_id,
         title=quiz_data.title,
         module_id=quiz_data.module_id or "",
         questions=quiz_data.questions
@@ -558,8 +1451,10 @@ async def update_quiz(quiz_id: str, quiz_data: QuizCreate, current_user: User =
     quiz_dict = updated_quiz.dict()
     quiz_dict["created_by"] = existing_quiz.get("created_by", current_user.id)
     quiz_dict["updated_at"] = datetime.now(timezone.utc)
+    quiz_dict.update(await sync_stamp())
     
-    await db.quizzes.update_one({"id": quiz_id}, {"$set": quiz_dict})
+    await db.quizzes.update_one({"tenant_id": current_user.tenant_id, "id": quiz_id}, {"$set": quiz_dict})
+    await invalidation_bus.publish("quizzes")
     return updated_quiz
 
 @api_router.delete("/teacher/quizzes/{quiz_id}")
@@ -568,19 +1463,22 @@ async def delete_quiz(quiz_id: str, current_user: User = Depends(get_current_use
         raise HTTPException(status_code=403, detail="Not authorized")
     
     # Check if quiz exists and user has permission
-    existing_quiz = await db.quizzes.find_one({"id": quiz_id})
+    existing_quiz = await db.quizzes.find_one({"tenant_id": current_user.tenant_id, "id": quiz_id})
     if not existing_quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
     if current_user.role == "teacher" and existing_quiz.get("created_by") != current_user.id:
         raise HTTPException(status_code=403, detail="Can only delete your own quizzes")
     
-    await db.quizzes.delete_one({"id": quiz_id})
+    await db.quizzes.delete_one({"tenant_id": current_user.tenant_id, "id": quiz_id})
+    await record_tombstone(current_user.tenant_id, "quizzes", quiz_id)
+    await invalidation_bus.publish("quizzes")
     return {"message": "Quiz deleted successfully"}
 
 @api_router.post("/quiz-attempts", response_model=QuizAttempt)
 async def submit_quiz(attempt: QuizAttempt, current_user: User = Depends(get_current_user)):
     attempt.user_id = current_user.id
+    attempt.tenant_id = current_user.tenant_id
     await db.quiz_attempts.insert_one(attempt.dict())
     return attempt
 
@@ -589,29 +1487,554 @@ async def get_quiz_attempts(user_id: str, current_user: User = Depends(get_curre
     if current_user.role != "admin" and current_user.role != "teacher" and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    attempts = await db.quiz_attempts.find({"user_id": user_id}).to_list(length=None)
+    attempts = await db.quiz_attempts.find({"tenant_id": current_user.tenant_id, "user_id": user_id}).to_list(length=None)
     return [QuizAttempt(**attempt) for attempt in attempts]
 
+# Quiz Item Analysis
+# Attempts are streamed in chunks into a dense int16 matrix (one row per attempt, one column
+# per question, -1 for unanswered or out-of-range choices) and every statistic is computed
+# on whole columns at once.
+# Results are cached per quiz and keyed on the attempt count, the newest attempt and the
+# quiz's updated_at, so a new submission or an edit recomputes on the next request. Attempts
+# made before the quiz was last edited are left out since they answered other questions.
+ITEM_ANALYSIS_CACHE_SIZE = 256
+DISCRIMINATION_GROUP_SHARE = 0.27  # Kelley's upper and lower groups
+
+item_analysis_cache = OrderedDict()  # (tenant_id, quiz_id) -> (signature, result)
+
+def answer_row(answers: list, option_counts: List[int]) -> list:
+    # user_answer comes straight from the client, so anything that isn't one of the
+    # question's options is treated as unanswered before it reaches the int16 matrix
+    row = [-1] * len(option_counts)
+    for index, answer in enumerate(answers[:len(option_counts)]):
+        choice = answer.get("user_answer") if isinstance(answer, dict) else None
+        if isinstance(choice, int) and not isinstance(choice, bool) and 0 <= choice < option_counts[index]:
+            row[index] = choice
+    return row
+
+async def load_answer_matrix(query: dict, option_counts: List[int]) -> np.ndarray:
+    chunk_size = max(1, settings.item_analysis_chunk_size)
+    cursor = db.quiz_attempts.find(query, {"_id": 0, "answers.user_answer": 1}).batch_size(chunk_size)
+    chunks, rows = [], []
+    async for attempt in cursor:
+        rows.append(answer_row(attempt.get("answers") or [], option_counts))
+        if len(rows) == chunk_size:
+            chunks.append(np.array(rows, dtype=np.int16))
+            rows = []
+    if rows:
+        chunks.append(np.array(rows, dtype=np.int16))
+    if not chunks:
+        return np.empty((0, len(option_counts)), dtype=np.int16)
+    return np.concatenate(chunks)
+
+def analyze_items(matrix: np.ndarray, correct: np.ndarray, option_counts: np.ndarray) -> dict:
+    attempts, question_count = matrix.shape
+    answered = matrix >= 0
+    scored = (answered & (matrix == correct)).astype(np.float64)
+    totals = scored.sum(axis=1)
+
+    difficulty = scored.mean(axis=0) if attempts else np.full(question_count, np.nan)
+
+    # Share answering correctly in the top 27% by total score minus the share in the bottom 27%
+    group = int(round(attempts * DISCRIMINATION_GROUP_SHARE))
+    if group:
+        order = np.argsort(totals, kind="stable")
+        discrimination = scored[order[-group:]].mean(axis=0) - scored[order[:group]].mean(axis=0)
+    else:
+        discrimination = np.full(question_count, np.nan)
+
+    # One column per option plus a final one for unanswered
+    width = int(option_counts.max(initial=0)) + 1
+    choices = np.where(answered, matrix, width - 1).astype(np.int64)
+    flat = (choices + np.arange(question_count) * width).ravel()
+    frequencies = np.bincount(flat, minlength=question_count * width).reshape(question_count, width)
+
+    if attempts > 1 and question_count > 1:
+        total_variance = totals.var(ddof=1)
+        alpha = (question_count / (question_count - 1)) * (1 - scored.var(axis=0, ddof=1).sum() / total_variance) if total_variance > 0 else np.nan
+    else:
+        alpha = np.nan
+
+    return {
+        "attempts": attempts,
+        "difficulty": difficulty,
+        "discrimination": discrimination,
+        "frequencies": frequencies,
+        "cronbach_alpha": alpha,
+        "mean_score": totals.mean() if attempts else np.nan
+    }
+
+def item_flags(difficulty: float, discrimination: float) -> List[str]:
+    flags = []
+    if not np.isnan(difficulty):
+        if difficulty < 0.3:
+            flags.append("too_hard")
+        elif difficulty > 0.9:
+            flags.append("too_easy")
+    if not np.isnan(discrimination) and discrimination < 0.2:
+        flags.append("low_discrimination")
+    return flags
+
+def rounded(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
+
+@api_router.get("/teacher/quizzes/{quiz_id}/item-analysis")
+async def get_quiz_item_analysis(quiz_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    quiz = await db.quizzes.find_one({"tenant_id": current_user.tenant_id, "id": quiz_id})
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+
+    query = {"tenant_id": current_user.tenant_id, "quiz_id": quiz_id}
+    if quiz.get("updated_at"):
+        query["completed_at"] = {"$gte": quiz["updated_at"]}
+    count = await db.quiz_attempts.count_documents(query)
+    newest = await db.quiz_attempts.find_one(query, {"_id": 1}, sort=[("_id", -1)])
+    signature = (count, newest["_id"] if newest else None, quiz.get("updated_at"))
+
+    key = (current_user.tenant_id, quiz_id)
+    cached = item_analysis_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        item_analysis_cache.move_to_end(key)
+        return cached[1]
+
+    questions = quiz.get("questions") or []
+    counts = [len(q.get("options") or []) for q in questions]
+    # The answer key is validated like an attempt, so a key outside the options scores nobody
+    correct = np.array(answer_row([{"user_answer": q.get("correct")} for q in questions], counts), dtype=np.int16)
+    option_counts = np.array(counts, dtype=np.int32)
+    matrix = await load_answer_matrix(query, counts)
+    stats = await asyncio.to_thread(analyze_items, matrix, correct, option_counts)
+
+    items = []
+    for index, question in enumerate(questions):
+        row = stats["frequencies"][index]
+        items.append({
+            "index": index,
+            "question": question.get("question", ""),
+            "correct": int(correct[index]),
+            "difficulty": rounded(stats["difficulty"][index]),
+            "discrimination": rounded(stats["discrimination"][index]),
+            "option_counts": [int(n) for n in row[:int(option_counts[index])]],
+            "unanswered": int(row[-1]),
+            "flags": item_flags(stats["difficulty"][index], stats["discrimination"][index])
+        })
+    result = {
+        "quiz_id": quiz_id,
+        "title": quiz.get("title", ""),
+        "attempts": stats["attempts"],
+        "question_count": len(questions),
+        "mean_score": rounded(stats["mean_score"]),
+        "cronbach_alpha": rounded(stats["cronbach_alpha"]),
+        "items": items,
+        "computed_at": datetime.now(timezone.utc)
+    }
+
+    item_analysis_cache[key] = (signature, result)
+    item_analysis_cache.move_to_end(key)
+    while len(item_analysis_cache) > ITEM_ANALYSIS_CACHE_SIZE:
+        item_analysis_cache.popitem(last=False)
+    return result
+
+# Drill Storage
+# Participations are append-only measurements, so they live in a time-series collection:
+# tenant, user and drill type form the metaField and MongoDB packs each series into
+# compressed buckets. Deployments from before are moved over once at startup; a claim in
+# db.meta stops other workers from copying the same documents meanwhile. Copies keep the
+# legacy _id and the batch in flight is recorded in the claim, so a run that stopped between
+# the copy and the delete skips what it already copied when it resumes. On servers without
+# time-series support (MongoDB < 5.0) the collection is created as a regular one.
+DRILL_TIMESERIES_OPTIONS = {"timeField": "participated_at", "metaField": "meta", "granularity": "hours"}
+DRILL_MIGRATION_BATCH_SIZE = 1000
+DRILL_MIGRATION_CLAIM = timedelta(minutes=10)
+DRILL_MIGRATION_OWNER = str(uuid.uuid4())
+
+def drill_document(participation: dict) -> dict:
+    # Legacy documents written by a partial earlier migration may already have the meta shape
+    meta = participation.get("meta") or {
+        "tenant_id": participation.get("tenant_id", settings.default_tenant_id),
+        "user_id": participation.get("user_id"),
+        "drill_type": participation["drill_type"]
+    }
+    measurements = {
+        k: v for k, v in participation.items()
+        if k not in ("meta", "tenant_id", "user_id", "drill_type", "idempotency_key")
+    }
+    return {**measurements, "meta": {"tenant_id": settings.default_tenant_id, **meta}}
+
+def drill_from_document(document: dict) -> DrillParticipation:
+    return DrillParticipation(**{k: v for k, v in document.items() if k != "meta"}, **document["meta"])
+
+def drill_query(tenant_id: str, user_id: str) -> dict:
+    return {"meta.tenant_id": tenant_id, "meta.user_id": user_id}
+
+async def migrate_drill_participations():
+    marker = await db.meta.find_one({"_id": "drill_timeseries"})
+    if marker and marker.get("state") == "done":
+        return
+    
+    now = datetime.now(timezone.utc)
+    try:
+        await db.meta.update_one(
+            {
+                "_id": "drill_timeseries",
+                "state": {"$ne": "done"},
+                # This worker retrying after an error, or a claim abandoned by a crashed worker
+                "$or": [{"owner": DRILL_MIGRATION_OWNER}, {"claimed_at": {"$lt": now - DRILL_MIGRATION_CLAIM}}]
+            },
+            {"$set": {"state": "migrating", "owner": DRILL_MIGRATION_OWNER, "claimed_at": now}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        raise RuntimeError("Another worker is migrating drill participations")
+    
+    if not (marker and marker.get("created")):
+        names = await db.list_collection_names()
+        if "drill_participations" in names and "drill_participations_legacy" not in names:
+            await db.drill_participations.rename("drill_participations_legacy")
+        try:
+            await db.create_collection("drill_participations", timeseries=DRILL_TIMESERIES_OPTIONS)
+        except CollectionInvalid:
+            pass
+        except OperationFailure:
+            logger.warning("Time-series collections are not supported, storing drill participations in a regular collection")
+        await db.meta.update_one({"_id": "drill_timeseries"}, {"$set": {"created": True}})
+    
+    legacy = db.drill_participations_legacy
+    pending = set((marker or {}).get("pending") or [])
+    while True:
+        # Batches go in _id order, so after a restart the first batch is the one left pending
+        batch = await legacy.find().sort("_id", ASCENDING).limit(DRILL_MIGRATION_BATCH_SIZE).to_list(length=None)
+        if not batch:
+            break
+        ids = [document["_id"] for document in batch]
+        copied = set()
+        if pending:
+            copied = {
+                document["_id"] for document in
+                await db.drill_participations.find({"_id": {"$in": list(pending)}}, {"_id": 1}).to_list(length=None)
+            }
+            pending = set()
+        await db.meta.update_one({"_id": "drill_timeseries"}, {"$set": {"pending": ids}})
+        documents = [drill_document(document) for document in batch if document["_id"] not in copied]
+        if documents:
+            await db.drill_participations.insert_many(documents)
+        # Keep replaying check-ins that are still inside the retention window
+        keys = [
+            {
+                "_id": document["idempotency_key"],
+                "participation": drill_from_document(drill_document(document)).dict(),
+                "expires_at": document["participated_at"] + timedelta(days=settings.drill_checkin_key_retention_days)
+            }
+            for document in batch if document.get("idempotency_key")
+        ]
+        if keys:
+            try:
+                await db.drill_checkin_keys.insert_many(keys, ordered=False)
+            except BulkWriteError:
+                pass
+        await legacy.delete_many({"_id": {"$in": ids}})
+        await db.meta.update_one({"_id": "drill_timeseries"}, {"$set": {"claimed_at": datetime.now(timezone.utc)}})
+    
+    await db.meta.update_one({"_id": "drill_timeseries"}, {"$set": {"state": "done"}, "$unset": {"pending": ""}})
+    await legacy.drop()
+
 # Drill Routes
 @api_router.post("/drills", response_model=DrillParticipation)
 async def record_drill_participation(drill: DrillParticipation, current_user: User = Depends(get_current_user)):
     drill.user_id = current_user.id
-    await db.drill_participations.insert_one(drill.dict())
+    drill.tenant_id = current_user.tenant_id
+    await db.drill_participations.insert_one(drill_document(drill.dict()))
     return drill
 
+def report_period_start(period: str, periods: int) -> datetime:
+    # First day of the oldest week (Monday) or month in the report, in UTC
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        return today - timedelta(days=today.weekday(), weeks=periods - 1)
+    months = today.year * 12 + today.month - 1 - (periods - 1)
+    return today.replace(year=months // 12, month=months % 12 + 1, day=1)
+
+@api_router.get("/drills/report")
+async def get_drill_report(
+    period: str = Query("week", pattern="^(week|month)$"),
+    periods: int = Query(12, ge=1, le=104),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    since = report_period_start(period, periods)
+    # Bucketing runs in the database, so the response size depends on periods, not participations.
+    # Periods are keyed by ISO week or month strings rather than $dateTrunc, which needs 5.0.
+    key_format = "%G-W%V" if period == "week" else "%Y-%m"
+    buckets = await db.drill_participations.aggregate([
+        {"$match": {"meta.tenant_id": current_user.tenant_id, "participated_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {"period": {"$dateToString": {"date": "$participated_at", "format": key_format}}, "drill_type": "$meta.drill_type"},
+            "participations": {"$sum": 1},
+            "participants": {"$addToSet": "$meta.user_id"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "period": "$_id.period",
+            "drill_type": "$_id.drill_type",
+            "participations": 1,
+            "participants": {"$size": "$participants"}
+        }},
+        {"$sort": {"period": 1, "drill_type": 1}}
+    ]).to_list(length=None)
+    for bucket in buckets:
+        key = bucket.pop("period")
+        start = datetime.strptime(f"{key}-1", "%G-W%V-%u") if period == "week" else datetime.strptime(key, "%Y-%m")
+        bucket["period_start"] = start.replace(tzinfo=timezone.utc)
+    return {"period": period, "since": since, "buckets": buckets}
+
 @api_router.get("/drills/{user_id}", response_model=List[DrillParticipation])
 async def get_drill_participations(user_id: str, current_user: User = Depends(get_current_user)):
     if current_user.role != "admin" and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    drills = await db.drill_participations.find({"user_id": user_id}).to_list(length=None)
-    return [DrillParticipation(**drill) for drill in drills]
+    drills = await db.drill_participations.find(drill_query(current_user.tenant_id, user_id)).sort("participated_at", 1).to_list(length=None)
+    return [drill_from_document(drill) for drill in drills]
+
+# Drill Check-in
+# Built for a whole school checking in within a minute. Requests join a buffer that is
+# written with one unordered insert_many per batch, and each caller waits for its batch to
+# land (group commit), so a response still means the check-in is stored. Idempotency keys
+# are remembered for DRILL_CHECKIN_DEDUPE_SECONDS so client retries share the original
+# write; retries that reach another worker collide on the key's _id in db.drill_checkin_keys
+# (time-series collections can't have unique indexes), which is claimed before the
+# participation is written. Per-drill totals are $inc'ed in db.drill_counters as batches land;
+# a counter whose $inc failed is marked stale and recounted from the stored rows on read.
+drill_checkins_counter = metrics.counter("drill_checkins_total", "Drill check-ins by outcome")
+drill_checkin_batch_histogram = metrics.histogram(
+    "drill_checkin_batch_size",
+    "Check-ins written per insert_many",
+    [1, 5, 10, 25, 50, 100, 250, 500, 1000]
+)
+
+class DrillCheckIn(BaseModel):
+    drill_id: str
+    drill_type: str
+    notes: Optional[str] = None
+
+class DrillCheckInBuffer:
+    def __init__(self):
+        self.batch_size = 500
+        self.flush_interval = 0.05
+        self.dedupe_seconds = 600
+        self._pending = []  # (document, future)
+        self._recent = OrderedDict()  # idempotency key -> (expires_at, future)
+        self._wakeup = None
+        self._task = None
+
+    def _forget_expired(self, now: float):
+        while self._recent:
+            key, (expires_at, _) = next(iter(self._recent.items()))
+            if expires_at > now:
+                break
+            del self._recent[key]
+
+    async def check_in(self, document: dict):
+        # Returns the stored participation and whether it was replayed for a duplicate key
+        now = time.monotonic()
+        self._forget_expired(now)
+        key = document["idempotency_key"]
+        if key in self._recent:
+            drill_checkins_counter.inc(outcome="replayed")
+            participation, _ = await asyncio.shield(self._recent[key][1])
+            return participation, True
+        
+        future = asyncio.get_running_loop().create_future()
+        self._recent[key] = (now + self.dedupe_seconds, future)
+        self._pending.append((document, future))
+        if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return await asyncio.shield(future)
+
+    async def _flush(self, batch: list):
+        documents = [document for document, _ in batch]
+        failed, duplicates = {}, set()
+        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.drill_checkin_key_retention_days)
+        try:
+            await db.drill_checkin_keys.insert_many([
+                {"_id": document["idempotency_key"], "participation": DrillParticipation(**document).dict(), "expires_at": expires_at}
+                for document in documents
+            ], ordered=False)
+        except BulkWriteError as exc:
+            for error in exc.details.get("writeErrors", []):
+                if error["code"] == 11000:
+                    duplicates.add(error["index"])
+                else:
+                    failed[error["index"]] = PyMongoError(error.get("errmsg", "Write failed"))
+        except Exception as exc:
+            failed = {index: exc for index in range(len(batch))}
+        
+        claimed = [index for index in range(len(batch)) if index not in failed and index not in duplicates]
+        if claimed:
+            try:
+                await db.drill_participations.insert_many([drill_document(documents[index]) for index in claimed], ordered=False)
+            except BulkWriteError as exc:
+                for error in exc.details.get("writeErrors", []):
+                    failed[claimed[error["index"]]] = PyMongoError(error.get("errmsg", "Write failed"))
+            except Exception as exc:
+                failed.update({index: exc for index in claimed})
+            # Release keys whose participation wasn't written so a retry can claim them again
+            released = [documents[index]["idempotency_key"] for index in claimed if index in failed]
+            if released:
+                try:
+                    await db.drill_checkin_keys.delete_many({"_id": {"$in": released}})
+                except PyMongoError:
+                    logger.warning("Releasing drill check-in keys failed", exc_info=True)
+        drill_checkin_batch_histogram.observe(len(batch) - len(failed) - len(duplicates))
+        
+        # Keys that reached the database through another worker resolve to the stored copy
+        existing = {}
+        if duplicates:
+            keys = [documents[index]["idempotency_key"] for index in duplicates]
+            try:
+                stored = await db.drill_checkin_keys.find({"_id": {"$in": keys}}).to_list(length=None)
+                existing = {document["_id"]: document["participation"] for document in stored}
+            except PyMongoError:
+                logger.warning("Looking up duplicate drill check-ins failed", exc_info=True)
+        
+        inserted = Counter()
+        for index, (document, future) in enumerate(batch):
+            if index in failed:
+                self._recent.pop(document["idempotency_key"], None)
+                drill_checkins_counter.inc(outcome="failed")
+                future.set_exception(failed[index])
+                future.exception()  # the caller may have gone away
+            elif index in duplicates:
+                drill_checkins_counter.inc(outcome="replayed")
+                future.set_result((DrillParticipation(**existing.get(document["idempotency_key"], document)), True))
+            else:
+                inserted[(document["tenant_id"], document["drill_id"])] += 1
+                drill_checkins_counter.inc(outcome="stored")
+                future.set_result((DrillParticipation(**document), False))
+        
+        if inserted:
+            now = datetime.now(timezone.utc)
+            try:
+                await db.drill_counters.bulk_write([
+                    UpdateOne(
+                        {"tenant_id": tenant_id, "drill_id": drill_id},
+                        {"$inc": {"count": count}, "$set": {"updated_at": now}},
+                        upsert=True
+                    )
+                    for (tenant_id, drill_id), count in inserted.items()
+                ], ordered=False)
+            except PyMongoError:
+                # The rows are stored, so the counters are rebuilt from them on the next read
+                logger.warning("Updating drill counters failed, marking them for a recount", exc_info=True)
+                await db.drill_counters.bulk_write([
+                    UpdateOne({"tenant_id": tenant_id, "drill_id": drill_id}, {"$set": {"stale": True}}, upsert=True)
+                    for tenant_id, drill_id in inserted
+                ], ordered=False)
+
+    async def _flush_pending(self):
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            try:
+                await self._flush(batch)
+            except Exception:
+                logger.exception("Flushing drill check-ins failed")
+            finally:
+                for document, future in batch:
+                    if not future.done():
+                        # Forget the key so a retry writes the check-in instead of replaying the cancellation
+                        if self._recent.get(document["idempotency_key"], (None, None))[1] is future:
+                            del self._recent[document["idempotency_key"]]
+                        future.cancel()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._pending) < self.batch_size:
+                # Give the burst a moment to fill the batch; a full batch wakes us early
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            await self._flush_pending()
+
+    def start(self, batch_size: int, flush_ms: float, dedupe_seconds: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.dedupe_seconds = dedupe_seconds
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        # Don't leave callers of the last batch hanging on shutdown
+        await self._flush_pending()
+        self._recent.clear()
+
+drill_checkins = DrillCheckInBuffer()
+
+async def rebuild_drill_counter(tenant_id: str, drill_id: str) -> dict:
+    count = await db.drill_participations.count_documents({"meta.tenant_id": tenant_id, "drill_id": drill_id})
+    return await db.drill_counters.find_one_and_update(
+        {"tenant_id": tenant_id, "drill_id": drill_id},
+        {"$set": {"count": count, "updated_at": datetime.now(timezone.utc)}, "$unset": {"stale": ""}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+@api_router.post("/drills/check-in", response_model=DrillParticipation)
+async def check_in_to_drill(
+    check_in: DrillCheckIn,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    participation = DrillParticipation(
+        tenant_id=current_user.tenant_id,
+        user_id=current_user.id,
+        drill_id=check_in.drill_id,
+        drill_type=check_in.drill_type,
+        notes=check_in.notes
+    )
+    # Without a key a student checks in to a given drill once
+    document = {**participation.dict(), "idempotency_key": f"{current_user.id}:{idempotency_key or check_in.drill_id}"}
+    stored, replayed = await drill_checkins.check_in(document)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return stored
+
+@api_router.get("/drills/{drill_id}/count")
+async def get_drill_checkin_count(drill_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    counter = await db.drill_counters.find_one({"tenant_id": current_user.tenant_id, "drill_id": drill_id})
+    if counter and counter.get("stale"):
+        counter = await rebuild_drill_counter(current_user.tenant_id, drill_id)
+    return {
+        "drill_id": drill_id,
+        "count": counter["count"] if counter else 0,
+        "updated_at": counter["updated_at"] if counter else None
+    }
 
 # Alert Routes
 @api_router.get("/alerts", response_model=List[Alert])
-async def get_active_alerts(current_user: User = Depends(get_current_user)):
-    alerts = await db.alerts.find({"active": True}).to_list(length=None)
-    return [Alert(**alert) for alert in alerts]
+async def get_active_alerts(tenant_id: str = Depends(get_current_tenant_or_degraded)):
+    async def load():
+        alerts = await db.alerts.find({"tenant_id": tenant_id, "active": True}).to_list(length=None)
+        return [Alert(**alert) for alert in alerts]
+    return await local_snapshot.serve(
+        tenant_id,
+        "alerts",
+        response_cache.get_or_compute("alerts", ("alerts", tenant_id, "active"), load)
+    )
 
 @api_router.post("/alerts", response_model=Alert)
 async def create_alert(alert: Alert, current_user: User = Depends(get_current_user)):
@@ -619,8 +2042,16 @@ async def create_alert(alert: Alert, current_user: User = Depends(get_current_us
     if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    if alert.expires_at is not None:
+        if alert.expires_at.tzinfo is None:
+            alert.expires_at = alert.expires_at.replace(tzinfo=timezone.utc)
+        if alert.expires_at <= datetime.now(timezone.utc):
+            raise HTTPException(status_code=400, detail="expires_at must be in the future")
+    
     alert.created_by = current_user.id
-    await db.alerts.insert_one(alert.dict())
+    alert.tenant_id = current_user.tenant_id
+    await db.alerts.insert_one({**alert.dict(), **await sync_stamp()})
+    await invalidation_bus.publish("alerts")
     return alert
 
 class AlertUpdate(BaseModel):
@@ -631,21 +2062,96 @@ async def update_alert(alert_id: str, alert_update: AlertUpdate, current_user: U
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    await db.alerts.update_one({"id": alert_id}, {"$set": {"active": alert_update.active}})
+    await db.alerts.update_one(
+        {"tenant_id": current_user.tenant_id, "id": alert_id},
+        {"$set": {"active": alert_update.active, **await sync_stamp()}}
+    )
+    await invalidation_bus.publish("alerts")
     return {"message": "Alert updated successfully"}
 
+# Alert Expiry
+# Every worker runs the sweeper; the update only matches alerts that are still active, so
+# whichever worker gets there first deactivates them and publishes the change, and sync
+# clients see the expired alerts as deletions. Between sweeps it sleeps until the next known
+# expiry (or ALERT_SWEEP_INTERVAL_SECONDS), and any alert write wakes it to re-plan.
+alerts_expired_counter = metrics.counter("alerts_expired_total", "Alerts deactivated by the expiry sweeper")
+
+class AlertExpirySweeper:
+    def __init__(self):
+        self._wakeup = None
+        self._task = None
+
+    async def sweep(self) -> Optional[datetime]:
+        # Returns when the next active alert expires, if any does
+        now = datetime.now(timezone.utc)
+        live = {"active": True, "expires_at": {"$ne": None}}
+        expired = await db.alerts.find({**live, "expires_at": {"$lte": now}}, {"id": 1}).to_list(length=None)
+        if expired:
+            result = await db.alerts.update_many(
+                {"id": {"$in": [alert["id"] for alert in expired]}, "active": True},
+                {"$set": {"active": False, **await sync_stamp()}}
+            )
+            if result.modified_count:
+                alerts_expired_counter.inc(result.modified_count)
+                logger.info("Deactivated %s expired alerts", result.modified_count)
+                await invalidation_bus.publish("alerts")
+        upcoming = await db.alerts.find_one({**live, "expires_at": {"$gt": now}}, {"expires_at": 1}, sort=[("expires_at", ASCENDING)])
+        return upcoming["expires_at"] if upcoming else None
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self, interval: float):
+        while True:
+            self._wakeup.clear()
+            delay = interval
+            try:
+                next_expiry = await self.sweep()
+                if next_expiry is not None:
+                    if next_expiry.tzinfo is None:
+                        next_expiry = next_expiry.replace(tzinfo=timezone.utc)
+                    delay = min(interval, max(0, (next_expiry - datetime.now(timezone.utc)).total_seconds()))
+            except Exception:
+                logger.warning("Sweeping expired alerts failed", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, interval: float):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(interval))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._wakeup = None
+
+alert_expiry = AlertExpirySweeper()
+invalidation_bus.subscribe("alerts", alert_expiry.wake)
+
 # Emergency Contacts Routes
 @api_router.get("/emergency-contacts", response_model=List[EmergencyContact])
-async def get_emergency_contacts(current_user: User = Depends(get_current_user)):
-    contacts = await db.emergency_contacts.find().to_list(length=None)
-    return [EmergencyContact(**contact) for contact in contacts]
+async def get_emergency_contacts(tenant_id: str = Depends(get_current_tenant_or_degraded)):
+    async def load():
+        contacts = await db.emergency_contacts.find({"tenant_id": tenant_id}).to_list(length=None)
+        return [EmergencyContact(**contact) for contact in contacts]
+    return await local_snapshot.serve(
+        tenant_id,
+        "emergency_contacts",
+        response_cache.get_or_compute("emergency-contacts", ("emergency-contacts", tenant_id, "all"), load)
+    )
 
 @api_router.post("/emergency-contacts", response_model=EmergencyContact)
 async def create_emergency_contact(contact: EmergencyContact, current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    await db.emergency_contacts.insert_one(contact.dict())
+    contact.tenant_id = current_user.tenant_id
+    await db.emergency_contacts.insert_one({**contact.dict(), **await sync_stamp()})
+    await invalidation_bus.publish("emergency_contacts")
     return contact
 
 @api_router.put("/emergency-contacts/{contact_id}", response_model=EmergencyContact)
@@ -654,29 +2160,172 @@ async def update_emergency_contact(contact_id: str, contact: EmergencyContact, c
         raise HTTPException(status_code=403, detail="Not authorized")
     
     contact.updated_at = datetime.now(timezone.utc)
-    await db.emergency_contacts.update_one({"id": contact_id}, {"$set": contact.dict()})
+    contact.tenant_id = current_user.tenant_id
+    await db.emergency_contacts.update_one(
+        {"tenant_id": current_user.tenant_id, "id": contact_id},
+        {"$set": {**contact.dict(), **await sync_stamp()}}
+    )
+    await invalidation_bus.publish("emergency_contacts")
     return contact
 
-# Disaster Prediction Routes
-@api_router.post("/predict-disaster", response_model=DisasterPrediction)
-async def predict_disaster(city: str, current_user: User = Depends(get_current_user)):
-    # Simple ML logic based on city characteristics
-    city_lower = city.lower()
-    risk_factors = []
-    disaster_types = []
-    base_risk = 10
-    
-    # Coastal cities - higher flood/hurricane risk
-    coastal_cities = ["miami", "new orleans", "san francisco", "seattle", "boston", "new york"]
-    if any(coastal in city_lower for coastal in coastal_cities):
-        base_risk += 25
-        disaster_types.extend(["flood", "hurricane"])
-        risk_factors.append("Coastal location")
-    
-    # Earthquake prone areas
-    earthquake_cities = ["san francisco", "los angeles", "seattle", "alaska"]
-    if any(eq_city in city_lower for eq_city in earthquake_cities):
-        base_risk += 20
+# Emergency Bundle
+# Emergency contacts and active alerts prebuilt as one compact JSON document, gzipped once
+# per build and kept in the response cache until a contact or alert write invalidates it.
+# The version (and ETag) is a hash of the content, so every worker hands out the same one
+# and revalidation is a bodyless 304. A versioned URL never changes and is cacheable for good.
+class EmergencyBundle(BaseModel):
+    version: str
+    body: bytes
+    gzipped: bytes
+
+async def build_emergency_bundle(tenant_id: str) -> EmergencyBundle:
+    contacts, alerts = await asyncio.gather(
+        db.emergency_contacts.find({"tenant_id": tenant_id}).sort("id", ASCENDING).to_list(length=None),
+        db.alerts.find({"tenant_id": tenant_id, "active": True}).sort("id", ASCENDING).to_list(length=None)
+    )
+    payload = jsonable_encoder({
+        "contacts": [EmergencyContact(**contact) for contact in contacts],
+        "alerts": [Alert(**alert) for alert in alerts]
+    }, exclude_none=True)
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode()
+    return EmergencyBundle(
+        version=hashlib.sha256(body).hexdigest()[:16],
+        body=body,
+        gzipped=gzip.compress(body, compresslevel=9, mtime=0)
+    )
+
+def emergency_bundle_response(bundle: EmergencyBundle, request: Request, cache_control: str) -> Response:
+    etag = f'"{bundle.version}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding", "X-Bundle-Version": bundle.version}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(bundle.gzipped, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(bundle.body, media_type="application/json", headers=headers)
+
+async def get_current_emergency_bundle(tenant_id: str) -> EmergencyBundle:
+    return await response_cache.get_or_compute(
+        "emergency-bundle",
+        ("emergency-bundle", tenant_id, "current"),
+        lambda: build_emergency_bundle(tenant_id)
+    )
+
+@api_router.get("/emergency-bundle")
+async def get_emergency_bundle(request: Request, current_user: User = Depends(get_current_user)):
+    # Revalidate on every use, but let a device fall back to its copy while the server is down
+    bundle = await get_current_emergency_bundle(current_user.tenant_id)
+    return emergency_bundle_response(bundle, request, "private, no-cache, stale-if-error=604800")
+
+@api_router.get("/emergency-bundle/{version}")
+async def get_emergency_bundle_version(version: str, request: Request, current_user: User = Depends(get_current_user)):
+    bundle = await get_current_emergency_bundle(current_user.tenant_id)
+    if bundle.version != version:
+        raise HTTPException(status_code=404, detail="Bundle version is no longer current")
+    return emergency_bundle_response(bundle, request, "private, max-age=31536000, immutable")
+
+# Delta Sync
+# Writes to the synced collections stamp each document with sync_seq from one counter and
+# deletions leave a tombstone, so /api/sync?since=<token> returns only what changed after
+# the token. Sequence numbers are allocated before the write lands, so a slow writer can
+# commit a lower number than one already visible; the returned token therefore stops short
+# of anything stamped within SYNC_SETTLE_SECONDS and those documents are sent again.
+SYNC_COLLECTIONS = ("modules", "quizzes", "emergency_contacts", "alerts")
+
+async def sync_stamp() -> dict:
+    counter = await db.counters.find_one_and_update(
+        {"_id": "sync"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return {"sync_seq": counter["seq"], "synced_at": datetime.now(timezone.utc)}
+
+async def record_tombstone(tenant_id: str, collection: str, doc_id: str):
+    await db.sync_tombstones.insert_one({"tenant_id": tenant_id, "collection": collection, "id": doc_id, **await sync_stamp()})
+
+async def backfill_sync_stamps():
+    # Seeded documents and anything written before delta sync existed
+    for name in SYNC_COLLECTIONS:
+        if await db[name].find_one({"sync_seq": {"$exists": False}}, {"_id": 1}):
+            await db[name].update_many({"sync_seq": {"$exists": False}}, {"$set": await sync_stamp()})
+
+@api_router.get("/sync")
+async def delta_sync(since: Optional[str] = None, collections: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    wanted = sorted(parse_fields(collections, SYNC_COLLECTIONS) or SYNC_COLLECTIONS)
+    try:
+        since_seq = int(since) if since else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    
+    counter = await db.counters.find_one({"_id": "sync"})
+    # Tokens ahead of the counter come from another database (restore, reset): start over
+    full = since_seq <= 0 or since_seq > (counter["seq"] if counter else 0)
+    if full:
+        since_seq = 0
+    
+    async def load(name: str):
+        query = {"tenant_id": current_user.tenant_id, "sync_seq": {"$gt": since_seq}}
+        if full and name == "alerts":
+            query["active"] = True
+        return await db[name].find(query, {"_id": 0}).to_list(length=None)
+    
+    async def load_tombstones():
+        if full:
+            return []
+        return await db.sync_tombstones.find(
+            {"tenant_id": current_user.tenant_id, "sync_seq": {"$gt": since_seq}, "collection": {"$in": wanted}},
+            {"_id": 0}
+        ).to_list(length=None)
+    
+    *results, tombstones = await asyncio.gather(*(load(name) for name in wanted), load_tombstones())
+    
+    changed, deleted = {}, {}
+    token, unsettled = since_seq, None
+    settled_before = datetime.now(timezone.utc) - timedelta(seconds=settings.sync_settle_seconds)
+    def track(doc: dict):
+        nonlocal token, unsettled
+        seq, synced_at = doc.pop("sync_seq"), doc.pop("synced_at")
+        token = max(token, seq)
+        if synced_at.replace(tzinfo=synced_at.tzinfo or timezone.utc) > settled_before:
+            unsettled = seq if unsettled is None else min(unsettled, seq)
+    
+    for name, docs in zip(wanted, results):
+        for doc in docs:
+            track(doc)
+            # Deactivated alerts are removals as far as clients are concerned
+            if name == "alerts" and not doc.get("active", True):
+                deleted.setdefault(name, []).append(doc["id"])
+            else:
+                changed.setdefault(name, []).append(doc)
+    for tombstone in tombstones:
+        track(tombstone)
+        deleted.setdefault(tombstone["collection"], []).append(tombstone["id"])
+    if unsettled is not None:
+        token = min(token, unsettled - 1)
+    
+    return {"token": str(token), "full": full, "changed": changed, "deleted": deleted}
+
+# Disaster Prediction Routes
+@api_router.post("/predict-disaster", response_model=DisasterPrediction)
+async def predict_disaster(city: str, current_user: User = Depends(get_current_user)):
+    # Simple ML logic based on city characteristics
+    city_lower = city.lower()
+    risk_factors = []
+    disaster_types = []
+    base_risk = 10
+    
+    # Coastal cities - higher flood/hurricane risk
+    coastal_cities = ["miami", "new orleans", "san francisco", "seattle", "boston", "new york"]
+    if any(coastal in city_lower for coastal in coastal_cities):
+        base_risk += 25
+        disaster_types.extend(["flood", "hurricane"])
+        risk_factors.append("Coastal location")
+    
+    # Earthquake prone areas
+    earthquake_cities = ["san francisco", "los angeles", "seattle", "alaska"]
+    if any(eq_city in city_lower for eq_city in earthquake_cities):
+        base_risk += 20
         disaster_types.append("earthquake")
         risk_factors.append("Seismic activity zone")
     
@@ -707,102 +2356,519 @@ async def predict_disaster(city: str, current_user: User = Depends(get_current_u
         risk_percentage=final_risk,
         disaster_types=disaster_types,
         factors=risk_factors,
-        predicted_by=current_user.id
+        predicted_by=current_user.id,
+        tenant_id=current_user.tenant_id
     )
     
     await db.disaster_predictions.insert_one(prediction.dict())
+    await record_latest_prediction(prediction)
     return prediction
 
 @api_router.get("/predictions", response_model=List[DisasterPrediction])
 async def get_predictions(current_user: User = Depends(get_current_user)):
-    predictions = await db.disaster_predictions.find().sort("predicted_at", -1).limit(50).to_list(length=None)
+    predictions = await db.disaster_predictions.find({"tenant_id": current_user.tenant_id}).sort("predicted_at", -1).limit(50).to_list(length=None)
     return [DisasterPrediction(**pred) for pred in predictions]
 
-# Enhanced User Stats Route
-@api_router.get("/user-stats/{user_id}")
-async def get_user_stats(user_id: str, current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin" and current_user.role != "teacher" and current_user.id != user_id:
+# Latest Prediction per City
+# One small document per (tenant, city), upserted with every prediction, so "what is the
+# current risk for this city" never has to search the prediction history. The upsert only
+# matches an older prediction; when a newer one is already stored it collides on the
+# unique index and is dropped.
+def city_key(city: str) -> str:
+    return " ".join(city.lower().split())
+
+async def record_latest_prediction(prediction: DisasterPrediction):
+    try:
+        await db.latest_predictions.update_one(
+            {"tenant_id": prediction.tenant_id, "city_key": city_key(prediction.city), "predicted_at": {"$lt": prediction.predicted_at}},
+            {"$set": prediction.dict()},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass
+
+async def backfill_latest_predictions():
+    # Databases with prediction history from before this collection existed
+    if await db.latest_predictions.find_one({}, {"_id": 1}) or not await db.disaster_predictions.find_one({}, {"_id": 1}):
+        return
+    latest = await db.disaster_predictions.aggregate([
+        {"$sort": {"predicted_at": 1}},
+        {"$group": {"_id": {"tenant_id": "$tenant_id", "city": {"$toLower": "$city"}}, "prediction": {"$last": "$$ROOT"}}}
+    ]).to_list(length=None)
+    for entry in latest:
+        await record_latest_prediction(DisasterPrediction(**entry["prediction"]))
+
+@api_router.get("/predictions/latest", response_model=List[DisasterPrediction])
+async def get_latest_predictions(city: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    query = {"tenant_id": current_user.tenant_id}
+    if city is not None:
+        query["city_key"] = city_key(city)
+    predictions = await db.latest_predictions.find(query).sort("city_key", ASCENDING).to_list(length=None)
+    if city is not None and not predictions:
+        raise HTTPException(status_code=404, detail="No prediction for this city")
+    return [DisasterPrediction(**pred) for pred in predictions]
+
+# Prediction Retention
+# Predictions past PREDICTION_RETENTION_DAYS are copied to the archive in batches and then
+# removed from the hot collection. Archived copies keep their _id, so a batch that is
+# copied twice (a crash between the two steps, or two workers sweeping at once) is only
+# stored once. The archive expires through a TTL index on expires_at.
+PREDICTION_RETENTION_BATCH_SIZE = 1000
+predictions_archived_counter = metrics.counter("predictions_archived_total", "Predictions moved to the archive")
+
+class PredictionRetention:
+    def __init__(self):
+        self._task = None
+
+    async def sweep(self) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.prediction_retention_days)
+        archived = 0
+        while True:
+            batch = await db.disaster_predictions.find({"predicted_at": {"$lt": cutoff}}).sort("predicted_at", ASCENDING).limit(
+                PREDICTION_RETENTION_BATCH_SIZE
+            ).to_list(length=None)
+            if not batch:
+                return archived
+            now = datetime.now(timezone.utc)
+            expires_at = now + timedelta(days=settings.prediction_archive_days) if settings.prediction_archive_days else None
+            copies = [{**prediction, "archived_at": now, "expires_at": expires_at} for prediction in batch]
+            try:
+                await db.disaster_predictions_archive.insert_many(copies, ordered=False)
+            except BulkWriteError as exc:
+                if any(error["code"] != 11000 for error in exc.details.get("writeErrors", [])):
+                    raise
+            await db.disaster_predictions.delete_many({"_id": {"$in": [prediction["_id"] for prediction in batch]}})
+            predictions_archived_counter.inc(len(batch))
+            archived += len(batch)
+
+    async def _run(self, interval: float):
+        # Let startup fill latest_predictions from the full history first
+        while not readiness["seeded"]:
+            await asyncio.sleep(1)
+        while True:
+            try:
+                archived = await self.sweep()
+                if archived:
+                    logger.info("Archived %s predictions", archived)
+            except Exception:
+                logger.warning("Archiving old predictions failed", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float):
+        if settings.prediction_retention_days <= 0:
+            return
+        self._task = asyncio.create_task(self._run(interval))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+prediction_retention = PredictionRetention()
+
+# Class Rosters
+# Classes map a teacher to the students they teach. Dashboards and the leaderboard look up
+# the caller's rosters (indexed on teacher_id and on the multikey student_ids) and load only
+# those students. Callers without any roster keep the whole-school view they had before.
+class ClassRoster(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
+    name: str
+    teacher_id: str
+    student_ids: List[str] = []
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class ClassRosterCreate(BaseModel):
+    name: str
+    teacher_id: Optional[str] = None  # admins assign a teacher; teachers create their own classes
+    student_ids: List[str] = []
+
+class RosterUpdate(BaseModel):
+    add: List[str] = []
+    remove: List[str] = []
+
+async def get_class_for(class_id: str, current_user: User) -> dict:
+    roster = await db.classes.find_one({"tenant_id": current_user.tenant_id, "id": class_id}, {"_id": 0})
+    if not roster:
+        raise HTTPException(status_code=404, detail="Class not found")
+    if current_user.role == "teacher" and roster["teacher_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if current_user.role == "student" and current_user.id not in roster["student_ids"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return roster
+
+async def resolve_rosters(current_user: User, class_id: Optional[str] = None) -> Optional[List[dict]]:
+    # None means the whole school
+    if class_id:
+        return [await get_class_for(class_id, current_user)]
+    if current_user.role == "admin":
+        return None
+    query = {"tenant_id": current_user.tenant_id}
+    if current_user.role == "teacher":
+        query["teacher_id"] = current_user.id
+    else:
+        query["student_ids"] = current_user.id
+    rosters = await db.classes.find(query, {"_id": 0, "id": 1, "student_ids": 1}).to_list(length=None)
+    return rosters or None
+
+def roster_scope(rosters: Optional[List[dict]]):
+    # Cache key part and student id filter for a set of rosters
+    if rosters is None:
+        return "all", None
+    student_ids = sorted({student_id for roster in rosters for student_id in roster["student_ids"]})
+    return tuple(sorted(roster["id"] for roster in rosters)), student_ids
+
+async def validate_roster_members(tenant_id: str, teacher_id: Optional[str], student_ids: List[str]):
+    if teacher_id and not await db.users.find_one({"tenant_id": tenant_id, "id": teacher_id, "role": "teacher"}, {"_id": 1}):
+        raise HTTPException(status_code=400, detail="Unknown teacher")
+    if student_ids:
+        found = await db.users.count_documents({"tenant_id": tenant_id, "id": {"$in": student_ids}, "role": "student"})
+        if found != len(set(student_ids)):
+            raise HTTPException(status_code=400, detail="Unknown student ids")
+
+@api_router.post("/classes", response_model=ClassRoster)
+async def create_class(class_data: ClassRosterCreate, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    teacher_id = current_user.id if current_user.role == "teacher" else class_data.teacher_id
+    if not teacher_id:
+        raise HTTPException(status_code=400, detail="teacher_id is required")
+    await validate_roster_members(
+        current_user.tenant_id,
+        teacher_id if current_user.role == "admin" else None,
+        class_data.student_ids
+    )
+    
+    roster = ClassRoster(
+        tenant_id=current_user.tenant_id,
+        name=class_data.name,
+        teacher_id=teacher_id,
+        student_ids=sorted(set(class_data.student_ids))
+    )
+    await db.classes.insert_one(roster.dict())
+    await invalidation_bus.publish("classes")
+    return roster
+
+@api_router.get("/classes", response_model=List[ClassRoster])
+async def get_classes(current_user: User = Depends(get_current_user)):
+    query = {"tenant_id": current_user.tenant_id}
+    if current_user.role == "teacher":
+        query["teacher_id"] = current_user.id
+    elif current_user.role != "admin":
+        query["student_ids"] = current_user.id
+    rosters = await db.classes.find(query).to_list(length=None)
+    return [ClassRoster(**roster) for roster in rosters]
+
+@api_router.get("/classes/{class_id}", response_model=ClassRoster)
+async def get_class(class_id: str, current_user: User = Depends(get_current_user)):
+    return ClassRoster(**await get_class_for(class_id, current_user))
+
+@api_router.put("/classes/{class_id}/students", response_model=ClassRoster)
+async def update_class_students(class_id: str, update: RosterUpdate, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    await get_class_for(class_id, current_user)
+    await validate_roster_members(current_user.tenant_id, None, update.add)
+    query = {"tenant_id": current_user.tenant_id, "id": class_id}
+    if update.add:
+        await db.classes.update_one(query, {"$addToSet": {"student_ids": {"$each": update.add}}})
+    if update.remove:
+        await db.classes.update_one(query, {"$pull": {"student_ids": {"$in": update.remove}}})
+    await invalidation_bus.publish("classes")
+    return ClassRoster(**await db.classes.find_one(query))
+
+@api_router.delete("/classes/{class_id}")
+async def delete_class(class_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    await get_class_for(class_id, current_user)
+    await db.classes.delete_one({"tenant_id": current_user.tenant_id, "id": class_id})
+    await invalidation_bus.publish("classes")
+    return {"message": "Class deleted successfully"}
+
+# Alert Receipts
+# Every user gets a dense per-tenant receipt_id from a counter, so the receipts for one alert
+# form a bitmap: 64-bit words keyed by word index, stored sparsely (empty words are never
+# written) and set with $bit, one small document per alert however many students read it.
+# Each tenant also keeps a bitmap of its students. Unacknowledged students and the
+# acknowledgement rate are then bitwise operations on the two, and only the resulting
+# receipt ids are looked up in db.users.
+RECEIPT_WORD_BITS = 64
+
+def bitmap_update(receipt_ids) -> dict:
+    # $bit operands that set the given bits
+    words = {}
+    for receipt_id in receipt_ids:
+        word, bit = divmod(receipt_id, RECEIPT_WORD_BITS)
+        words[word] = words.get(word, 0) | (1 << bit)
+    update = {}
+    for word, mask in words.items():
+        # BSON integers are signed
+        if mask >= 1 << (RECEIPT_WORD_BITS - 1):
+            mask -= 1 << RECEIPT_WORD_BITS
+        update[f"words.{word}"] = {"or": Int64(mask)}
+    return update
+
+def load_bitmap(document: Optional[dict]) -> int:
+    bitmap = 0
+    for word, mask in ((document or {}).get("words") or {}).items():
+        bitmap |= (mask & ((1 << RECEIPT_WORD_BITS) - 1)) << (int(word) * RECEIPT_WORD_BITS)
+    return bitmap
+
+def bitmap_ids(bitmap: int) -> List[int]:
+    ids = []
+    while bitmap:
+        lowest = bitmap & -bitmap
+        ids.append(lowest.bit_length() - 1)
+        bitmap ^= lowest
+    return ids
+
+async def assign_receipt_ids(tenant_id: str):
+    users = await db.users.find(
+        {"tenant_id": tenant_id, "receipt_id": {"$exists": False}},
+        {"id": 1, "role": 1}
+    ).to_list(length=None)
+    if not users:
+        return
+    counter = await db.counters.find_one_and_update(
+        {"_id": f"receipt_ids:{tenant_id}"},
+        {"$inc": {"seq": len(users)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    students = []
+    for receipt_id, user in enumerate(users, start=counter["seq"] - len(users)):
+        # Another worker may have numbered this user first; its id wins and ours goes unused
+        result = await db.users.update_one(
+            {"tenant_id": tenant_id, "id": user["id"], "receipt_id": {"$exists": False}},
+            {"$set": {"receipt_id": receipt_id}}
+        )
+        if result.modified_count and user["role"] == "student":
+            students.append(receipt_id)
+    if students:
+        await db.receipt_bitmaps.update_one(
+            {"_id": f"{tenant_id}:students"},
+            {"$bit": bitmap_update(students), "$setOnInsert": {"tenant_id": tenant_id}},
+            upsert=True
+        )
+
+async def backfill_receipt_ids():
+    for tenant_id in await db.users.distinct("tenant_id", {"receipt_id": {"$exists": False}}):
+        await assign_receipt_ids(tenant_id)
+
+async def get_alert_for(alert_id: str, current_user: User) -> dict:
+    alert = await db.alerts.find_one({"tenant_id": current_user.tenant_id, "id": alert_id}, {"_id": 0, "id": 1, "title": 1})
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
+
+async def receipt_bitmaps(alert_id: str, current_user: User, class_id: Optional[str]):
+    # (students in scope, students in scope who acknowledged)
+    _, student_ids = roster_scope(await resolve_rosters(current_user, class_id))
+    if student_ids is None:
+        students = load_bitmap(await db.receipt_bitmaps.find_one({"_id": f"{current_user.tenant_id}:students"}))
+    else:
+        roster = await db.users.find(
+            {"tenant_id": current_user.tenant_id, "id": {"$in": student_ids}, "receipt_id": {"$exists": True}},
+            {"receipt_id": 1}
+        ).to_list(length=None)
+        students = sum(1 << user["receipt_id"] for user in roster)
+    acknowledged = load_bitmap(await db.alert_receipts.find_one({"_id": alert_id}))
+    return students, acknowledged & students
+
+@api_router.post("/alerts/{alert_id}/acknowledge")
+async def acknowledge_alert(alert_id: str, current_user: User = Depends(get_current_user)):
+    await get_alert_for(alert_id, current_user)
+    user = await db.users.find_one({"tenant_id": current_user.tenant_id, "id": current_user.id}, {"receipt_id": 1})
+    if user.get("receipt_id") is None:
+        await assign_receipt_ids(current_user.tenant_id)
+        user = await db.users.find_one({"tenant_id": current_user.tenant_id, "id": current_user.id}, {"receipt_id": 1})
+    
+    await db.alert_receipts.update_one(
+        {"_id": alert_id},
+        {"$bit": bitmap_update([user["receipt_id"]]), "$setOnInsert": {"tenant_id": current_user.tenant_id}},
+        upsert=True
+    )
+    return {"alert_id": alert_id, "acknowledged": True}
+
+@api_router.get("/alerts/{alert_id}/receipts")
+async def get_alert_receipts(alert_id: str, class_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    await get_alert_for(alert_id, current_user)
+    students, acknowledged = await receipt_bitmaps(alert_id, current_user, class_id)
+    total, acknowledged_count = students.bit_count(), acknowledged.bit_count()
+    return {
+        "alert_id": alert_id,
+        "total_students": total,
+        "acknowledged": acknowledged_count,
+        "acknowledgement_rate": round(acknowledged_count / total * 100, 1) if total else 0.0
+    }
+
+@api_router.get("/alerts/{alert_id}/receipts/unacknowledged")
+async def get_unacknowledged_students(alert_id: str, class_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    await get_alert_for(alert_id, current_user)
+    students, acknowledged = await receipt_bitmaps(alert_id, current_user, class_id)
+    missing = bitmap_ids(students & ~acknowledged)
+    users = await db.users.find(
+        {"tenant_id": current_user.tenant_id, "receipt_id": {"$in": missing}},
+        {"_id": 0, "id": 1, "full_name": 1, "username": 1}
+    ).sort("full_name", ASCENDING).to_list(length=None)
+    return [
+        {"student_id": user["id"], "student_name": user["full_name"], "student_username": user["username"]}
+        for user in users
+    ]
+
+# Enhanced User Stats Route
+USER_STATS_FIELDS = (
+    "total_quizzes_completed",
+    "total_points",
+    "total_drills_participated",
+    "completed_modules",
+    "total_modules",
+    "module_progress",
+    "recent_quiz_attempts",
+    "recent_drill_participations"
+)
+# What the leaderboard and dashboards rank on; none of these need per-module documents
+RANKING_STATS_FIELDS = {"total_points", "completed_modules", "total_modules", "total_quizzes_completed"}
+
+def parse_fields(fields: Optional[str], allowed) -> Optional[set]:
+    if fields is None:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+async def compute_user_stats(tenant_id: str, user_id: str, fields: Optional[set] = None) -> dict:
+    # Only sections that were asked for are queried; fields=None means everything
+    def wanted(field):
+        return fields is None or field in fields
+    stats = {"user_id": user_id}
+    user_query = {"tenant_id": tenant_id, "user_id": user_id}
+    
     # Get quiz attempts
-    quiz_attempts = await db.quiz_attempts.find({"user_id": user_id}).to_list(length=None)
-    total_quizzes = len(quiz_attempts)
-    total_points = sum(attempt["score"] for attempt in quiz_attempts)
+    quiz_attempts = None
+    if wanted("module_progress") or wanted("recent_quiz_attempts"):
+        quiz_attempts = await db.quiz_attempts.find(user_query).to_list(length=None)
+    if wanted("total_quizzes_completed") or wanted("total_points"):
+        if quiz_attempts is not None:
+            totals = {"count": len(quiz_attempts), "points": sum(attempt["score"] for attempt in quiz_attempts)}
+        else:
+            grouped = await db.quiz_attempts.aggregate([
+                {"$match": user_query},
+                {"$group": {"_id": None, "count": {"$sum": 1}, "points": {"$sum": "$score"}}}
+            ]).to_list(length=1)
+            totals = grouped[0] if grouped else {"count": 0, "points": 0}
+        if wanted("total_quizzes_completed"):
+            stats["total_quizzes_completed"] = totals["count"]
+        if wanted("total_points"):
+            stats["total_points"] = totals["points"]
     
     # Get drill participations
-    drill_participations = await db.drill_participations.find({"user_id": user_id}).to_list(length=None)
-    total_drills = len(drill_participations)
+    if wanted("total_drills_participated"):
+        stats["total_drills_participated"] = await db.drill_participations.count_documents(drill_query(tenant_id, user_id))
     
     # Get video completions
-    video_completions = await db.video_completions.find({"user_id": user_id}).to_list(length=None)
-    completed_modules = len(video_completions)
+    video_completions = None
+    if wanted("module_progress"):
+        video_completions = await db.video_completions.find(user_query).to_list(length=None)
+    if wanted("completed_modules"):
+        if video_completions is not None:
+            stats["completed_modules"] = len(video_completions)
+        else:
+            stats["completed_modules"] = await db.video_completions.count_documents(user_query)
     
     # Get module progress
-    modules = await db.modules.find().sort("order", 1).to_list(length=None)
-    module_progress = []
-    
-    for module in modules:
-        # Check video completion
-        video_completed = await db.video_completions.find_one({
-            "user_id": user_id, 
-            "module_id": module["id"]
-        })
+    if wanted("module_progress"):
+        modules = await db.modules.find({"tenant_id": tenant_id}).sort("order", 1).to_list(length=None)
         
-        # Check quiz attempts for this module
-        quiz_attempt = await db.quiz_attempts.find_one({
-            "user_id": user_id,
-            "module_id": module["id"]
-        })
+        # First completion and first attempt per module, matching the old per-module find_one
+        completion_by_module = {}
+        for completion in video_completions:
+            completion_by_module.setdefault(completion["module_id"], completion)
+        attempt_by_module = {}
+        for attempt in quiz_attempts:
+            attempt_by_module.setdefault(attempt["module_id"], attempt)
         
-        module_progress.append({
-            "module_id": module["id"],
-            "module_title": module["title"],
-            "video_completed": video_completed is not None,
-            "video_completed_at": video_completed["completed_at"] if video_completed else None,
-            "quiz_completed": quiz_attempt is not None,
-            "quiz_score": quiz_attempt["score"] if quiz_attempt else 0,
-            "quiz_total": quiz_attempt["total_questions"] if quiz_attempt else 0,
-            "quiz_completed_at": quiz_attempt["completed_at"] if quiz_attempt else None
-        })
+        module_progress = []
+        for module in modules:
+            video_completed = completion_by_module.get(module["id"])
+            quiz_attempt = attempt_by_module.get(module["id"])
+            module_progress.append({
+                "module_id": module["id"],
+                "module_title": module["title"],
+                "video_completed": video_completed is not None,
+                "video_completed_at": video_completed["completed_at"] if video_completed else None,
+                "quiz_completed": quiz_attempt is not None,
+                "quiz_score": quiz_attempt["score"] if quiz_attempt else 0,
+                "quiz_total": quiz_attempt["total_questions"] if quiz_attempt else 0,
+                "quiz_completed_at": quiz_attempt["completed_at"] if quiz_attempt else None
+            })
+        if wanted("total_modules"):
+            stats["total_modules"] = len(modules)
+        stats["module_progress"] = module_progress
+    elif wanted("total_modules"):
+        stats["total_modules"] = await db.modules.count_documents({"tenant_id": tenant_id})
     
     # Convert MongoDB documents to JSON-serializable format
-    recent_quiz_attempts = []
-    for attempt in quiz_attempts[-5:] if quiz_attempts else []:
+    if wanted("recent_quiz_attempts"):
         # Remove MongoDB ObjectId and convert to dict
-        attempt_dict = {k: v for k, v in attempt.items() if k != '_id'}
-        recent_quiz_attempts.append(attempt_dict)
+        stats["recent_quiz_attempts"] = [{k: v for k, v in attempt.items() if k != '_id'} for attempt in quiz_attempts[-5:]]
     
-    recent_drill_participations = []
-    for drill in drill_participations[-5:] if drill_participations else []:
-        # Remove MongoDB ObjectId and convert to dict
-        drill_dict = {k: v for k, v in drill.items() if k != '_id'}
-        recent_drill_participations.append(drill_dict)
+    if wanted("recent_drill_participations"):
+        # Newest five, oldest first, without loading the whole history
+        drills = await db.drill_participations.find(drill_query(tenant_id, user_id)).sort("participated_at", -1).limit(5).to_list(length=None)
+        stats["recent_drill_participations"] = [drill_from_document(drill).dict() for drill in reversed(drills)]
     
-    return {
-        "user_id": user_id,
-        "total_quizzes_completed": total_quizzes,
-        "total_points": total_points,
-        "total_drills_participated": total_drills,
-        "completed_modules": completed_modules,
-        "total_modules": len(modules),
-        "module_progress": module_progress,
-        "recent_quiz_attempts": recent_quiz_attempts,
-        "recent_drill_participations": recent_drill_participations
-    }
+    return stats
 
-# Teacher Dashboard - All Students Progress with Ranking
-@api_router.get("/teacher/students-progress")
-async def get_all_students_progress(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin" and current_user.role != "teacher":
+@api_router.get("/user-stats/{user_id}")
+async def get_user_stats(user_id: str, fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin" and current_user.role != "teacher" and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Get all students
-    students = await db.users.find({"role": "student"}).to_list(length=None)
+    return await compute_user_stats(current_user.tenant_id, user_id, parse_fields(fields, USER_STATS_FIELDS))
+
+# Teacher Dashboard - All Students Progress with Ranking
+STUDENT_PROGRESS_FIELDS = (
+    "student_name",
+    "student_username",
+    "total_points",
+    "completed_modules",
+    "total_modules",
+    "total_quizzes",
+    "completion_speed",
+    "overall_score",
+    "module_progress"
+)
+
+async def build_students_progress(
+    tenant_id: str,
+    include_module_progress: bool = True,
+    student_ids: Optional[List[str]] = None
+) -> dict:
+    stats_fields = RANKING_STATS_FIELDS | {"module_progress"} if include_module_progress else RANKING_STATS_FIELDS
+    
+    # Get the students on the roster, or all students
+    query = {"tenant_id": tenant_id, "role": "student"}
+    if student_ids is not None:
+        query["id"] = {"$in": student_ids}
+    students = await db.users.find(query).to_list(length=None)
     
     students_progress = []
     for student in students:
         # Get student stats
-        stats = await get_user_stats(student["id"], current_user)
+        stats = await compute_user_stats(tenant_id, student["id"], stats_fields)
         
         # Calculate completion speed score (modules completed / days since account creation)
         # Handle timezone-aware vs timezone-naive datetime comparison
@@ -824,9 +2890,10 @@ async def get_all_students_progress(current_user: User = Depends(get_current_use
             "total_modules": stats["total_modules"],
             "total_quizzes": stats["total_quizzes_completed"],
             "completion_speed": round(completion_speed, 2),
-            "overall_score": round(overall_score, 1),
-            "module_progress": stats["module_progress"]
+            "overall_score": round(overall_score, 1)
         })
+        if include_module_progress:
+            students_progress[-1]["module_progress"] = stats["module_progress"]
     
     # Sort by overall score for ranking
     students_progress.sort(key=lambda x: x["overall_score"], reverse=True)
@@ -856,19 +2923,47 @@ async def get_all_students_progress(current_user: User = Depends(get_current_use
         }
     }
 
-# Student Leaderboard Route
-@api_router.get("/leaderboard")
-async def get_student_leaderboard(current_user: User = Depends(get_current_user)):
-    if current_user.role not in ["admin", "teacher", "student"]:
+@api_router.get("/teacher/students-progress")
+async def get_all_students_progress(
+    fields: Optional[str] = None,
+    class_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "admin" and current_user.role != "teacher":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Get all students
-    students = await db.users.find({"role": "student"}).to_list(length=None)
+    requested = parse_fields(fields, STUDENT_PROGRESS_FIELDS)
+    include_module_progress = requested is None or "module_progress" in requested
+    
+    # Callers with the same rosters share one cache entry
+    scope, student_ids = roster_scope(await resolve_rosters(current_user, class_id))
+    progress = await response_cache.get_or_compute(
+        "students-progress",
+        ("students-progress", current_user.tenant_id, scope, include_module_progress),
+        lambda: build_students_progress(current_user.tenant_id, include_module_progress, student_ids)
+    )
+    if requested is None:
+        return progress
+    
+    # student_id and rank identify each row and are always returned
+    keep = requested | {"student_id", "rank"}
+    return {
+        "students_progress": [{k: v for k, v in row.items() if k in keep} for row in progress["students_progress"]],
+        "class_statistics": progress["class_statistics"]
+    }
+
+# Student Leaderboard Route
+async def build_leaderboard(tenant_id: str, student_ids: Optional[List[str]] = None) -> List[dict]:
+    # Get the students on the roster, or all students
+    query = {"tenant_id": tenant_id, "role": "student"}
+    if student_ids is not None:
+        query["id"] = {"$in": student_ids}
+    students = await db.users.find(query).to_list(length=None)
     
     leaderboard = []
     for student in students:
         # Get student stats
-        stats = await get_user_stats(student["id"], current_user)
+        stats = await compute_user_stats(tenant_id, student["id"], RANKING_STATS_FIELDS)
         
         # Calculate completion speed score
         # Handle timezone-aware vs timezone-naive datetime comparison
@@ -900,6 +2995,22 @@ async def get_student_leaderboard(current_user: User = Depends(get_current_user)
     for i, student in enumerate(leaderboard):
         student["rank"] = i + 1
     
+    return leaderboard
+
+@api_router.get("/leaderboard")
+async def get_student_leaderboard(class_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher", "student"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    # Students rank against their classmates and teachers see their own classes; the ranking
+    # is shared by everyone with the same rosters and only current_user_rank is per user
+    scope, student_ids = roster_scope(await resolve_rosters(current_user, class_id))
+    leaderboard = await response_cache.get_or_compute(
+        "leaderboard",
+        ("leaderboard", current_user.tenant_id, scope),
+        lambda: build_leaderboard(current_user.tenant_id, student_ids)
+    )
+    
     # Return top 10 for leaderboard display
     return {
         "leaderboard": leaderboard[:10],
@@ -908,21 +3019,17 @@ async def get_student_leaderboard(current_user: User = Depends(get_current_user)
     }
 
 # Teacher Progress Tracking for Admin
-@api_router.get("/admin/teachers-progress")
-async def get_teachers_progress(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
+async def build_teachers_progress(tenant_id: str) -> dict:
     # Get all teachers
-    teachers = await db.users.find({"role": "teacher"}).to_list(length=None)
+    teachers = await db.users.find({"tenant_id": tenant_id, "role": "teacher"}).to_list(length=None)
     
     teachers_progress = []
     for teacher in teachers:
         # Get quizzes created by teacher
-        created_quizzes = await db.quizzes.find({"created_by": teacher["id"]}).to_list(length=None)
+        created_quizzes = await db.quizzes.find({"tenant_id": tenant_id, "created_by": teacher["id"]}).to_list(length=None)
         
         # Get alerts created by teacher
-        created_alerts = await db.alerts.find({"created_by": teacher["id"]}).to_list(length=None)
+        created_alerts = await db.alerts.find({"tenant_id": tenant_id, "created_by": teacher["id"]}).to_list(length=None)
         
         teachers_progress.append({
             "teacher_id": teacher["id"],
@@ -942,17 +3049,905 @@ async def get_teachers_progress(current_user: User = Depends(get_current_user)):
         "total_teachers": len(teachers_progress)
     }
 
-# Include the router in the main app
-app.include_router(api_router)
+@api_router.get("/admin/teachers-progress")
+async def get_teachers_progress(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return await response_cache.get_or_compute(
+        "teachers-progress",
+        ("teachers-progress", current_user.tenant_id),
+        lambda: build_teachers_progress(current_user.tenant_id)
+    )
+
+# Report Jobs
+# Long dashboards can be requested as jobs: POST returns a job id immediately, a bounded
+# pool of background workers builds the report, and the job document (status and result)
+# lives in MongoDB until expires_at so any worker can answer polls. Identical requests in
+# the same role scope reuse the existing job while it is pending or its result is fresh.
+# Like the dashboards, reports only cover the caller's rosters: the scope is the role plus
+# the roster ids, and readers must resolve to the same scope as the job.
+REPORT_TYPES = {
+    "students-progress": (["admin", "teacher"], lambda tenant_id, student_ids: build_students_progress(tenant_id, student_ids=student_ids)),
+    "teachers-progress": (["admin"], lambda tenant_id, student_ids: build_teachers_progress(tenant_id)),
+    "leaderboard": (["admin", "teacher", "student"], build_leaderboard)
+}
+REPORT_TERMINAL_STATES = ("completed", "failed")
+
+report_jobs_counter = metrics.counter("report_jobs_total", "Report jobs by type and outcome")
+
+class ReportRequest(BaseModel):
+    report_type: str
+    class_id: Optional[str] = None
+
+class ReportJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = Field(default_factory=default_tenant_id)
+    report_type: str
+    requested_by: str
+    scope: str  # role and rosters the result was built for; anyone in that scope may read it
+    cache_key: str
+    class_id: Optional[str] = None
+    student_ids: Optional[List[str]] = None  # None for whole-school reports
+    status: str = "queued"  # queued, running, completed, failed
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: datetime
+
+class ReportWorkerPool:
+    def __init__(self):
+        self.queue = None
+        self._workers = []
+
+    def start(self, workers: int, queue_size: int):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(workers)]
+
+    def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+    def submit(self, job: ReportJob) -> bool:
+        try:
+            self.queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _work(self):
+        # Report queries use the analytics lane's connection pool and, like the dashboards
+        # they precompute, may read from secondaries
+        request_lane.set("analytics")
+        request_reads_secondary.set(True)
+        while True:
+            job = await self.queue.get()
+            # Any failure, including the status writes themselves, fails this job only;
+            # the worker has to survive it or later jobs would stay queued forever
+            try:
+                await self._run(job)
+            except Exception as exc:
+                logger.exception("Report job %s failed", job.id)
+                report_jobs_counter.inc(report_type=job.report_type, outcome="failed")
+                await self._mark_failed(job, exc)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: ReportJob):
+        await db.report_jobs.update_one(
+            {"tenant_id": job.tenant_id, "id": job.id},
+            {"$set": {"status": "running", "started_at": datetime.now(timezone.utc)}}
+        )
+        _, build = REPORT_TYPES[job.report_type]
+        result = await build(job.tenant_id, job.student_ids)
+        await db.report_jobs.update_one(
+            {"tenant_id": job.tenant_id, "id": job.id},
+            {"$set": {
+                "status": "completed",
+                "result": result,
+                "finished_at": datetime.now(timezone.utc),
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=settings.report_result_ttl_seconds)
+            }}
+        )
+        report_jobs_counter.inc(report_type=job.report_type, outcome="completed")
+
+    async def _mark_failed(self, job: ReportJob, exc: Exception):
+        try:
+            await db.report_jobs.update_one(
+                {"tenant_id": job.tenant_id, "id": job.id},
+                {"$set": {"status": "failed", "error": str(exc), "finished_at": datetime.now(timezone.utc)}}
+            )
+        except Exception:
+            logger.exception("Could not mark report job %s as failed", job.id)
+
+report_pool = ReportWorkerPool()
+
+async def report_scope(current_user: User, class_id: Optional[str] = None):
+    rosters, student_ids = roster_scope(await resolve_rosters(current_user, class_id))
+    return f"{current_user.role}:{rosters if rosters == 'all' else ','.join(rosters)}", student_ids
+
+async def get_report_job_for(job_id: str, current_user: User, projection: Optional[dict] = None) -> dict:
+    job = await db.report_jobs.find_one(
+        {"tenant_id": current_user.tenant_id, "id": job_id, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+        projection
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if current_user.role != "admin":
+        scope, _ = await report_scope(current_user, job.get("class_id"))
+        if job["scope"] != scope:
+            raise HTTPException(status_code=403, detail="Not authorized")
+    return job
+
+@api_router.post("/reports", response_model=ReportJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_report(report: ReportRequest, current_user: User = Depends(get_current_user)):
+    if report.report_type not in REPORT_TYPES:
+        raise HTTPException(status_code=400, detail="Unknown report type")
+    allowed_roles, _ = REPORT_TYPES[report.report_type]
+    if current_user.role not in allowed_roles:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    # Reuse a pending job or fresh result for the same report, tenant and roster scope
+    scope, student_ids = await report_scope(current_user, report.class_id)
+    cache_key = f"{current_user.tenant_id}:{report.report_type}:{scope}"
+    existing = await db.report_jobs.find_one(
+        {
+            "tenant_id": current_user.tenant_id,
+            "cache_key": cache_key,
+            "status": {"$in": ["queued", "running", "completed"]},
+            "expires_at": {"$gt": datetime.now(timezone.utc)}
+        },
+        {"result": 0},
+        sort=[("created_at", -1)]
+    )
+    if existing:
+        report_jobs_counter.inc(report_type=report.report_type, outcome="reused")
+        return ReportJob(**existing)
+    
+    # Pending jobs expire too, so one lost with its worker doesn't block new requests forever
+    job = ReportJob(
+        tenant_id=current_user.tenant_id,
+        report_type=report.report_type,
+        requested_by=current_user.id,
+        scope=scope,
+        cache_key=cache_key,
+        class_id=report.class_id,
+        student_ids=student_ids,
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.report_result_ttl_seconds)
+    )
+    await db.report_jobs.insert_one(job.dict())
+    if not report_pool.submit(job):
+        await db.report_jobs.delete_one({"tenant_id": job.tenant_id, "id": job.id})
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Report queue is full, please retry shortly",
+            headers={"Retry-After": "5"}
+        )
+    return job
+
+@api_router.get("/reports/{job_id}", response_model=ReportJob)
+async def get_report_status(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await get_report_job_for(job_id, current_user, {"result": 0})
+    return ReportJob(**job)
+
+@api_router.get("/reports/{job_id}/events")
+async def stream_report_status(job_id: str, current_user: User = Depends(get_current_user)):
+    await get_report_job_for(job_id, current_user, {"result": 0})
+
+    async def events():
+        last_status = None
+        while True:
+            job = await db.report_jobs.find_one({"tenant_id": current_user.tenant_id, "id": job_id}, {"result": 0, "_id": 0})
+            if job is None:
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                payload = json.dumps(jsonable_encoder(ReportJob(**job)))
+                yield f"event: status\ndata: {payload}\n\n"
+            if last_status in REPORT_TERMINAL_STATES:
+                return
+            await asyncio.sleep(1)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@api_router.get("/reports/{job_id}/result")
+async def get_report_result(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await get_report_job_for(job_id, current_user)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Report failed: {job.get('error')}")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Report is {job['status']}")
+    return job["result"]
+
+# Batch Requests
+# Runs several API calls in-process and concurrently behind one HTTP request. Each
+# sub-request goes through the full ASGI app (lanes, admission control, validation) with
+# the caller's Authorization header, but JWT decoding and the user lookup happen once. The
+# batch hands back its own slots before dispatching, so sub-requests queue for their own
+# route and lane limits without waiting behind the batch that issued them.
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+async def dispatch_subrequest(app, sub: BatchSubRequest, authorization: str) -> dict:
+    path, _, query = sub.path.partition("?")
+    if not path.startswith("/api/") or path.rstrip("/") == "/api/batch":
+        return {"id": sub.id, "status": 400, "body": {"detail": "Sub-request path must be a non-batch /api route"}}
+    
+    body = json.dumps(jsonable_encoder(sub.body)).encode() if sub.body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": sub.method.upper(),
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [
+            (b"authorization", authorization.encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode())
+        ],
+        "client": None,
+        "server": None
+    }
+    request_sent = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    response = {"status": 500, "headers": {}, "chunks": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # One failing sub-request must not take the rest of the batch down with it
+        logger.exception("Batch sub-request %s %s failed", sub.method.upper(), path)
+        return {"id": sub.id, "status": 500, "body": {"detail": "Internal Server Error"}}
+    finally:
+        finished.set()
+    
+    raw = b"".join(response["chunks"])
+    if response["headers"].get("content-type", "").startswith("application/json") and raw:
+        payload = json.loads(raw)
+    else:
+        payload = raw.decode(errors="replace")
+    return {"id": sub.id, "status": response["status"], "body": payload}
+
+@api_router.post("/batch")
+async def execute_batch(batch: BatchRequest, request: Request, current_user: User = Depends(get_current_user)):
+    if len(batch.requests) > settings.batch_max_requests:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {settings.batch_max_requests} requests")
+    
+    authorization = request.headers["authorization"]
+    batch_authenticated_user.set((authorization.partition(" ")[2], current_user))
+    release_held_limiters(request.scope)
+    responses = await asyncio.gather(*[
+        dispatch_subrequest(request.app, sub, authorization) for sub in batch.requests
+    ])
+    return {"responses": responses}
+
+# Sampling Profiler
+# Runs only while a profile is requested: a daemon thread polls sys._current_frames()
+# at a fixed interval and counts identical stacks, so nothing is hooked in when idle.
+class SamplingProfiler:
+    def __init__(self):
+        self._busy = threading.Lock()
+
+    @staticmethod
+    def _frame_key(frame):
+        code = frame.f_code
+        return (code.co_name, code.co_filename, frame.f_lineno)
+
+    def _collect(self, seconds: float, interval: float):
+        own_id = threading.get_ident()
+        samples = {}  # thread name -> Counter of stacks (root first)
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_key(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                thread_name = names.get(thread_id, str(thread_id))
+                samples.setdefault(thread_name, Counter())[tuple(stack)] += 1
+            time.sleep(interval)
+        return samples, time.perf_counter() - started
+
+    def run(self, seconds: float, interval: float):
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return self._collect(seconds, interval)
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    def to_collapsed(samples) -> str:
+        lines = []
+        for thread_name, stacks in samples.items():
+            for stack, count in stacks.most_common():
+                frames = [thread_name] + [f"{name} ({Path(filename).name}:{line})" for name, filename, line in stack]
+                lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def to_speedscope(samples, elapsed: float, interval: float) -> dict:
+        frames = []
+        frame_index = {}
+        profiles = []
+        for thread_name, stacks in samples.items():
+            profile_samples = []
+            weights = []
+            for stack, count in stacks.items():
+                indexes = []
+                for key in stack:
+                    if key not in frame_index:
+                        frame_index[key] = len(frames)
+                        frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                    indexes.append(frame_index[key])
+                profile_samples.append(indexes)
+                weights.append(count * interval)
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": elapsed,
+                "samples": profile_samples,
+                "weights": weights
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "name": "Disaster Preparedness System worker profile",
+            "exporter": "server.SamplingProfiler"
+        }
+
+profiler = SamplingProfiler()
+
+@api_router.get("/admin/profile")
+async def profile_worker(
+    seconds: float = Query(5.0, gt=0),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(status_code=400, detail=f"Profiles are limited to {settings.profiler_max_seconds:g} seconds")
+
+    # Sample from a worker thread so the event loop keeps serving (and being sampled)
+    interval = interval_ms / 1000
+    result = await asyncio.to_thread(profiler.run, seconds, interval)
+    if result is None:
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+
+    samples, elapsed = result
+    if format == "speedscope":
+        return SamplingProfiler.to_speedscope(samples, elapsed, interval)
+    return PlainTextResponse(SamplingProfiler.to_collapsed(samples))
+
+# Event Loop Watchdog
+# A heartbeat task measures how late each asyncio.sleep() wakes up (loop lag). A separate
+# thread notices when the heartbeat stops advancing and grabs the loop thread's stack while
+# the stall is still in progress, which points at the synchronous code responsible.
+loop_lag_histogram = metrics.histogram(
+    "event_loop_lag_seconds",
+    "Delay between scheduled and actual heartbeat wake-ups",
+    [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+)
+loop_stall_counter = metrics.counter("event_loop_stalls_total", "Heartbeats that exceeded the stall threshold")
+
+class EventLoopWatchdog:
+    def __init__(self):
+        self.interval = 0.1
+        self.threshold = 0.25
+        self.recent_stalls = deque(maxlen=20)
+        self._last_beat = time.monotonic()
+        self._captured = False
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_beat = time.monotonic()
+            self._captured = False
+            loop_lag_histogram.observe(lag)
+            if lag > self.threshold:
+                loop_stall_counter.inc()
+                logger.warning("Event loop stalled for %.0f ms", lag * 1000)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            blocked_for = time.monotonic() - self._last_beat - self.interval
+            if blocked_for <= self.threshold or self._captured:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._captured = True
+            stack = "".join(traceback.format_stack(frame))
+            self.recent_stalls.append({
+                "detected_at": datetime.now(timezone.utc),
+                "blocked_ms": round(blocked_for * 1000, 1),
+                "stack": stack
+            })
+            logger.warning("Event loop blocked for %.0f ms in:\n%s", blocked_for * 1000, stack)
+
+    def start(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+loop_watchdog = EventLoopWatchdog()
+
+@api_router.get("/admin/event-loop/stalls")
+async def get_event_loop_stalls(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return {
+        "enabled": settings.loop_watchdog_enabled,
+        "threshold_ms": settings.loop_stall_threshold_ms,
+        "stalls": list(loop_watchdog.recent_stalls)
+    }
+
+@api_router.get("/admin/metrics", response_class=PlainTextResponse)
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Memory Diagnostics
+# tracemalloc is off by default. Admins can switch it on to take and diff snapshots, and
+# the periodic sampler turns it on for short windows to catch requests that allocate more
+# than MEMORY_REQUEST_BUDGET_MB. Per-request figures are exact when requests don't overlap
+# and approximate otherwise, since tracemalloc counters are process-wide.
+def _current_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+class MemoryProfiler:
+    def __init__(self):
+        self.baseline = None
+        self.previous = None
+        self.route_peaks = {}  # route -> {"requests", "max_peak_bytes", "total_peak_bytes"}
+        self._in_flight = 0
+        self._sampler_task = None
+        self._session = False  # an admin turned tracing on; the sampler must leave it running
+
+    def start(self, frames: int):
+        # Tracing left on by the sampler's window only records one frame; take it over
+        if tracemalloc.is_tracing() and not self._session:
+            tracemalloc.stop()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._session = True
+        self.baseline = self.previous = tracemalloc.take_snapshot()
+
+    def stop(self):
+        self._session = False
+        tracemalloc.stop()
+        self.baseline = self.previous = None
+
+    def snapshot(self, compare: str, limit: int) -> dict:
+        current = tracemalloc.take_snapshot()
+        reference = self.baseline if compare == "baseline" else self.previous
+        self.previous = current
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        current = current.filter_traces(filters)
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_current_bytes": traced_current,
+            "traced_peak_bytes": traced_peak,
+            "rss_bytes": _current_rss_bytes(),
+            "top_allocations": [
+                {"site": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+                for stat in current.statistics("lineno")[:limit]
+            ],
+            "growth": [
+                {"site": str(stat.traceback[0]), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in current.compare_to(reference.filter_traces(filters), "lineno")[:limit]
+            ] if reference is not None else [],
+            "compared_to": compare
+        }
+
+    def request_started(self) -> int:
+        # Only reset the process-wide peak when no other request is being measured
+        if self._in_flight == 0:
+            tracemalloc.reset_peak()
+        self._in_flight += 1
+        return tracemalloc.get_traced_memory()[0]
+
+    def request_finished(self, route: str, started_bytes: int):
+        self._in_flight -= 1
+        peak = max(0, tracemalloc.get_traced_memory()[1] - started_bytes)
+        stats = self.route_peaks.setdefault(route, {"requests": 0, "max_peak_bytes": 0, "total_peak_bytes": 0})
+        stats["requests"] += 1
+        stats["max_peak_bytes"] = max(stats["max_peak_bytes"], peak)
+        stats["total_peak_bytes"] += peak
+        budget_mb = settings.memory_request_budget_mb
+        if budget_mb and peak > budget_mb * 1024 * 1024:
+            logger.warning("Request to %s allocated %.1f MB (budget %.1f MB)", route, peak / 1024 / 1024, budget_mb)
+
+    async def _sample_periodically(self):
+        while True:
+            await asyncio.sleep(settings.memory_sampler_interval_seconds)
+            if tracemalloc.is_tracing():
+                continue  # an admin session already has tracing on
+            tracemalloc.start(1)
+            try:
+                await asyncio.sleep(settings.memory_sampler_window_seconds)
+            finally:
+                if not self._session:
+                    tracemalloc.stop()
+
+    def start_sampler(self):
+        if settings.memory_request_budget_mb > 0:
+            self._sampler_task = asyncio.create_task(self._sample_periodically())
+
+    def stop_sampler(self):
+        if self._sampler_task:
+            self._sampler_task.cancel()
+
+memory_profiler = MemoryProfiler()
+
+class MemoryTrackingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+        started_bytes = memory_profiler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            memory_profiler.request_finished(route.path if route else scope["path"], started_bytes)
+
+class MemoryTracingRequest(BaseModel):
+    enabled: bool
+    frames: Optional[int] = None
+
+@api_router.post("/admin/memory/tracing")
+async def set_memory_tracing(tracing: MemoryTracingRequest, current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    if tracing.enabled:
+        memory_profiler.start(tracing.frames or settings.memory_trace_frames)
+    else:
+        memory_profiler.stop()
+    return {"tracing": tracemalloc.is_tracing()}
+
+@api_router.get("/admin/memory/snapshot")
+async def get_memory_snapshot(
+    compare: str = Query("previous", pattern="^(previous|baseline)$"),
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not tracemalloc.is_tracing() or memory_profiler.baseline is None:
+        raise HTTPException(status_code=409, detail="Memory tracing is not enabled")
+    
+    # Snapshots walk every traced block; keep that off the event loop
+    report = await asyncio.to_thread(memory_profiler.snapshot, compare, limit)
+    report["route_peaks"] = memory_profiler.route_peaks
+    return report
+
+# MongoDB Pool Monitoring
+# Checkout start and finish are reported on the same driver thread, so a thread-local start
+# time is enough to measure how long each operation waited for a pooled connection.
+pool_checkout_wait_histogram = metrics.histogram(
+    "mongo_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the MongoDB pool",
+    [0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0]
+)
+pool_checkout_failures = metrics.counter("mongo_pool_checkout_failures_total", "Failed connection checkouts by reason")
+pool_connections_gauge = metrics.gauge("mongo_pool_connections", "Open pooled connections")
+pool_checked_out_gauge = metrics.gauge("mongo_pool_checked_out_connections", "Connections currently checked out")
+pool_max_size_gauge = metrics.gauge("mongo_pool_max_size", "Configured maxPoolSize per server and client")
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    def __init__(self, pool: str):
+        self.pool = pool
+        self._checkout_started = threading.local()
+
+    def _labels(self, event) -> dict:
+        host, port = event.address
+        return {"pool": self.pool, "server": f"{host}:{port}"}
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
+    def connection_created(self, event):
+        pool_connections_gauge.inc(**self._labels(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pool_connections_gauge.inc(-1, **self._labels(event))
+
+    def connection_check_out_started(self, event):
+        self._checkout_started.at = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        pool_checkout_failures.inc(reason=event.reason, **self._labels(event))
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout_started, "at", None)
+        if started is not None:
+            pool_checkout_wait_histogram.observe(time.perf_counter() - started, **self._labels(event))
+        pool_checked_out_gauge.inc(**self._labels(event))
+
+    def connection_checked_in(self, event):
+        pool_checked_out_gauge.inc(-1, **self._labels(event))
+
+# Admission Control
+# Per-route concurrency limits with a bounded FIFO wait queue. When a route is at its limit
+# and the queue is full (or a request waits longer than the queue timeout) the request is
+# shed with 503 + Retry-After before any handler work is done. Exempt routes are never
+# limited, not even by ADMISSION_DEFAULT_LIMIT.
+admission_shed_counter = metrics.counter("admission_shed_total", "Requests rejected with 503 by admission control")
+admission_queued_counter = metrics.counter("admission_queued_total", "Requests that had to wait for a concurrency slot")
+admission_in_flight_gauge = metrics.gauge("admission_in_flight", "Requests currently holding a concurrency slot")
+admission_queue_depth_gauge = metrics.gauge("admission_queue_depth", "Requests currently waiting for a concurrency slot")
+admission_wait_histogram = metrics.histogram(
+    "admission_queue_wait_seconds",
+    "Time queued requests waited for a concurrency slot",
+    [0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
 )
 
+def parse_pair_spec(spec: str) -> dict:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        route, _, limit = item.rpartition('=')
+        max_concurrent, _, max_queued = limit.partition(':')
+        limits[route] = (int(max_concurrent), int(max_queued or 0))
+    return limits
+
+def match_route_path(scope) -> Optional[str]:
+    # Resolve the route template ("/api/user-stats/{user_id}") before the router runs
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+class ConcurrencyLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queued: int, labels: Optional[dict] = None):
+        self.name = name
+        self.labels = labels or {"route": name}
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self.waiting = deque()
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active < self.max_concurrent and not self.waiting:
+            self.active += 1
+            admission_in_flight_gauge.set(self.active, **self.labels)
+            return True
+        if len(self.waiting) >= self.max_queued:
+            return False
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiting.append(waiter)
+        admission_queued_counter.inc(**self.labels)
+        admission_queue_depth_gauge.set(len(self.waiting), **self.labels)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            if waiter in self.waiting:
+                self.waiting.remove(waiter)
+            admission_queue_depth_gauge.set(len(self.waiting), **self.labels)
+        admission_wait_histogram.observe(time.perf_counter() - started, **self.labels)
+        # A slot handed over by release() is ours even if the timeout fired at the same moment
+        return not waiter.cancelled()
+
+    def release(self):
+        # Hand the slot straight to the oldest live waiter so queued requests keep FIFO order
+        while self.waiting:
+            waiter = self.waiting.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+        admission_in_flight_gauge.set(self.active, **self.labels)
+
+# Slots a request holds are listed in its scope, so a handler that only fans out (the batch
+# endpoint) can give them back early; the middleware then skips its own release
+def hold_limiter(scope, limiter: ConcurrencyLimiter):
+    scope.setdefault("held_limiters", []).append(limiter)
+
+def release_held_limiter(scope, limiter: ConcurrencyLimiter):
+    held = scope.get("held_limiters", [])
+    if limiter in held:
+        held.remove(limiter)
+        limiter.release()
+
+def release_held_limiters(scope):
+    held = scope.get("held_limiters", [])
+    while held:
+        held.pop().release()
+
+class AdmissionController:
+    def __init__(self, app_settings: Settings):
+        self.queue_timeout = app_settings.admission_queue_timeout_ms / 1000
+        self.retry_after = app_settings.admission_retry_after_seconds
+        self.exempt = set(filter(None, (r.strip() for r in app_settings.admission_exempt_routes.split(','))))
+        self.limiters = {
+            route: ConcurrencyLimiter(route, *limit)
+            for route, limit in parse_pair_spec(app_settings.admission_limits).items()
+        }
+        self.default_limit = parse_pair_spec(f"*={app_settings.admission_default_limit}")["*"] if app_settings.admission_default_limit else None
+
+    def limiter_for(self, route: str) -> Optional[ConcurrencyLimiter]:
+        if route in self.exempt:
+            return None
+        if route not in self.limiters and self.default_limit:
+            self.limiters[route] = ConcurrencyLimiter(route, *self.default_limit)
+        return self.limiters.get(route)
+
+class AdmissionControlMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        route = match_route_path(scope) if scope["type"] == "http" else None
+        limiter = self.controller.limiter_for(route) if route else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if not await limiter.acquire(self.controller.queue_timeout):
+            admission_shed_counter.inc(route=route)
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Server is busy, please retry shortly"},
+                headers={"Retry-After": str(self.controller.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        hold_limiter(scope, limiter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            release_held_limiter(scope, limiter)
+
+# Priority Lanes
+# Routes are classified into critical, interactive and analytics lanes. Each lane has its
+# own concurrency slice and queue, and lanes listed in LANE_POOL_SIZES get a dedicated Mongo
+# client, so saturated dashboards can neither take every slot nor every pooled connection
+# away from alerts and emergency contacts.
+lane_requests_counter = metrics.counter("lane_requests_total", "Requests admitted per priority lane")
+
+class LaneScheduler:
+    def __init__(self, app_settings: Settings):
+        self.queue_timeout = app_settings.admission_queue_timeout_ms / 1000
+        self.retry_after = app_settings.admission_retry_after_seconds
+        self.routes = {}
+        for lane, spec in (("critical", app_settings.lane_critical_routes), ("analytics", app_settings.lane_analytics_routes)):
+            for route in filter(None, (r.strip() for r in spec.split(','))):
+                self.routes[route] = lane
+        self.secondary_routes = set(filter(None, (r.strip() for r in app_settings.secondary_read_routes.split(','))))
+        self.limiters = {
+            lane: ConcurrencyLimiter(lane, *limit, labels={"lane": lane})
+            for lane, limit in parse_pair_spec(app_settings.lane_limits).items()
+        }
+
+    def lane_for(self, route: Optional[str]) -> str:
+        return self.routes.get(route, "interactive")
+
+class PriorityLaneMiddleware:
+    def __init__(self, app, scheduler: LaneScheduler):
+        self.app = app
+        self.scheduler = scheduler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        route = match_route_path(scope)
+        lane = self.scheduler.lane_for(route)
+        limiter = self.scheduler.limiters.get(lane)
+        if limiter is not None and not await limiter.acquire(self.scheduler.queue_timeout):
+            admission_shed_counter.inc(lane=lane)
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Server is busy, please retry shortly"},
+                headers={"Retry-After": str(self.scheduler.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        
+        if limiter is not None:
+            hold_limiter(scope, limiter)
+        lane_requests_counter.inc(lane=lane)
+        token = request_lane.set(lane)
+        secondary_token = request_reads_secondary.set(route in self.scheduler.secondary_routes)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_reads_secondary.reset(secondary_token)
+            request_lane.reset(token)
+            if limiter is not None:
+                release_held_limiter(scope, limiter)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -960,11 +3955,86 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
-async def startup_event():
-    await initialize_default_data()
-    logger.info("Application started and default data initialized")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Handlers, workers and the database proxy are process-wide, so starting an app makes its
+    # settings current; a second app with its own settings can't run beside it
+    global client, settings, running_app
+    if running_app is not None:
+        raise RuntimeError("Another app is already running in this process")
+    settings = app.state.settings
+    client = AsyncIOMotorClient(
+        settings.mongo_url,
+        event_listeners=[PoolMetricsListener("main")],
+        **settings.mongo_client_options()
+    )
+    pool_max_size_gauge.set(settings.mongo_max_pool_size, pool="main")
+    for lane, (pool_size, _) in parse_pair_spec(settings.lane_pool_sizes).items():
+        lane_clients[lane] = AsyncIOMotorClient(
+            settings.mongo_url,
+            event_listeners=[PoolMetricsListener(lane)],
+            **{**settings.mongo_client_options(), "maxPoolSize": pool_size}
+        )
+        pool_max_size_gauge.set(pool_size, pool=lane)
+    db.bind(
+        client[settings.db_name],
+        {lane: c[settings.db_name] for lane, c in lane_clients.items()},
+        secondary_read_preference(settings)
+    )
+    
+    if settings.loop_watchdog_enabled:
+        loop_watchdog.start(settings.loop_watchdog_interval_ms / 1000, settings.loop_stall_threshold_ms / 1000)
+    memory_profiler.start_sampler()
+    report_pool.start(settings.report_workers, settings.report_queue_size)
+    local_snapshot.start(settings.snapshot_path, settings.snapshot_refresh_seconds)
+    drill_checkins.start(settings.drill_checkin_batch_size, settings.drill_checkin_flush_ms, settings.drill_checkin_dedupe_seconds)
+    alert_expiry.start(settings.alert_sweep_interval_seconds)
+    prediction_retention.start(settings.prediction_retention_interval_seconds)
+    invalidation_bus.start(settings.invalidation_backend, settings.invalidation_max_delay_ms, settings.invalidation_collection_size_bytes)
+    for step in readiness:
+        readiness[step] = False
+    prepare_task = asyncio.create_task(prepare_database())
+    running_app = app
+    logger.info("Application started, preparing database in the background")
+    try:
+        yield
+    finally:
+        prepare_task.cancel()
+        loop_watchdog.stop()
+        memory_profiler.stop_sampler()
+        report_pool.stop()
+        local_snapshot.stop()
+        await drill_checkins.stop()
+        alert_expiry.stop()
+        prediction_retention.stop()
+        invalidation_bus.stop()
+        for lane_client in lane_clients.values():
+            lane_client.close()
+        lane_clients.clear()
+        client.close()
+        running_app = None
+
+def create_app(app_settings: Optional[Settings] = None) -> FastAPI:
+    # Each app is built from its own settings (the environment by default); they take
+    # effect for the whole process when the app's lifespan starts
+    app_settings = app_settings or Settings.from_env()
+    app = FastAPI(title="Disaster Preparedness System", lifespan=lifespan)
+    app.state.settings = app_settings
+    
+    # Include the router in the main app
+    app.include_router(api_router)
+    
+    app.add_middleware(MemoryTrackingMiddleware)
+    app.add_middleware(PriorityLaneMiddleware, scheduler=LaneScheduler(app_settings))
+    app.add_middleware(AdmissionControlMiddleware, controller=AdmissionController(app_settings))
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=app_settings.cors_origins.split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return app
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+app = create_app()
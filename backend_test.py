@@ -1,7 +1,8 @@
 import requests
 import sys
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 class DisasterPreparednessAPITester:
     def __init__(self, base_url="https://learnanalytics-1.preview.emergentagent.com/api"):
@@ -55,6 +56,18 @@ class DisasterPreparednessAPITester:
             print(f"❌ Failed - Error: {str(e)}")
             return False, {}
 
+    def test_health_probes(self):
+        """Test liveness and readiness probes"""
+        print("\n" + "="*50)
+        print("TESTING HEALTH PROBES")
+        print("="*50)
+        
+        self.run_test("Liveness Probe", "GET", "/health/live", 200)
+        
+        success, readiness = self.run_test("Readiness Probe", "GET", "/health/ready", 200)
+        if success and readiness:
+            print(f"  Seeded: {readiness.get('seeded')}, Indexes: {readiness.get('indexes')}")
+
     def test_authentication(self):
         """Test authentication for all user types"""
         print("\n" + "="*50)
@@ -148,6 +161,68 @@ class DisasterPreparednessAPITester:
                 token=self.student_token
             )
 
+    def test_tenant_isolation(self):
+        """Test that tenants only see their own data"""
+        print("\n" + "="*50)
+        print("TESTING TENANT ISOLATION")
+        print("="*50)
+        
+        if not self.admin_token:
+            print("❌ Skipping tenant tests - no admin token")
+            return
+        
+        # Onboard a new district by creating its first admin
+        suffix = datetime.now().strftime('%H%M%S')
+        tenant_admin = {
+            "username": f"district_admin_{suffix}",
+            "email": f"district_admin_{suffix}@district.edu",
+            "full_name": "District Admin",
+            "password": "district123",
+            "role": "admin",
+            "tenant_id": f"test-district-{suffix}"
+        }
+        success, created = self.run_test(
+            "Create Admin In New Tenant",
+            "POST",
+            "/users",
+            200,
+            data=tenant_admin,
+            token=self.admin_token
+        )
+        if not success:
+            return
+        
+        success, login = self.run_test(
+            "New Tenant Admin Login",
+            "POST",
+            "/auth/login",
+            200,
+            data={"username": tenant_admin["username"], "password": tenant_admin["password"]}
+        )
+        if not success:
+            return
+        tenant_token = login['access_token']
+        
+        success, users = self.run_test(
+            "New Tenant Users",
+            "GET",
+            "/users",
+            200,
+            token=tenant_token
+        )
+        if success and any(u['tenant_id'] != created['tenant_id'] for u in users):
+            print("❌ Users from another tenant are visible")
+        
+        success, modules = self.run_test(
+            "New Tenant Seeded Modules",
+            "GET",
+            "/modules",
+            200,
+            token=tenant_token
+        )
+        if success:
+            print(f"  New tenant has {len(modules)} modules")
+
     def test_quiz_system(self):
         """Test quiz-related endpoints"""
         print("\n" + "="*50)
@@ -167,6 +242,27 @@ class DisasterPreparednessAPITester:
             token=self.student_token
         )
         
+        # Lightweight catalog listing and per-quiz detail
+        success_summary, summaries = self.run_test(
+            "Get Quiz Summaries",
+            "GET",
+            "/quizzes/summary",
+            200,
+            token=self.student_token
+        )
+        if success_summary and summaries:
+            summary = summaries[0]
+            print(f"Summary: {summary['title']} with {summary['question_count']} questions")
+            if 'questions' in summary:
+                print("❌ Summary listing should not include questions")
+            self.run_test(
+                "Get Quiz Detail",
+                "GET",
+                f"/quizzes/{summary['id']}",
+                200,
+                token=self.student_token
+            )
+        
         if success and quizzes:
             quiz = quizzes[0]
             print(f"Found quiz: {quiz['title']} with {len(quiz['questions'])} questions")
@@ -242,6 +338,59 @@ class DisasterPreparednessAPITester:
             200,
             token=self.student_token
         )
+        
+        # Burst-tolerant check-in: retrying the same drill returns the original record
+        drill_id = f"drill-{int(time.time())}"
+        check_in = {"drill_id": drill_id, "drill_type": "Fire Drill"}
+        success, first = self.run_test(
+            "Drill Check-in",
+            "POST",
+            "/drills/check-in",
+            200,
+            data=check_in,
+            token=self.student_token
+        )
+        success_retry, retry = self.run_test(
+            "Drill Check-in Retry",
+            "POST",
+            "/drills/check-in",
+            200,
+            data=check_in,
+            token=self.student_token
+        )
+        if success and success_retry and first.get('id') != retry.get('id'):
+            print("❌ Retried check-in created a second participation")
+        
+        if self.teacher_token:
+            success, count = self.run_test(
+                "Live Drill Check-in Count",
+                "GET",
+                f"/drills/{drill_id}/count",
+                200,
+                token=self.teacher_token
+            )
+            if success:
+                print(f"  Check-ins for {drill_id}: {count.get('count')}")
+
+            # Participation trends, bucketed by the database
+            for period in ["week", "month"]:
+                success, report = self.run_test(
+                    f"Drill Report per {period.title()}",
+                    "GET",
+                    f"/drills/report?period={period}&periods=4",
+                    200,
+                    token=self.teacher_token
+                )
+                if success:
+                    print(f"  {len(report.get('buckets', []))} {period}ly buckets since {report.get('since')}")
+
+        self.run_test(
+            "Student Cannot View Drill Report",
+            "GET",
+            "/drills/report",
+            403,
+            token=self.student_token
+        )
 
     def test_alert_system(self):
         """Test alert management endpoints"""
@@ -288,6 +437,37 @@ class DisasterPreparednessAPITester:
                     token=self.admin_token
                 )
         
+            # Alerts with expires_at are deactivated by the expiry sweeper
+            expiring_data = {**alert_data, "title": "Expiring Test Alert", "expires_at": (datetime.utcnow() + timedelta(seconds=2)).isoformat()}
+            success, expiring = self.run_test(
+                "Create Expiring Alert",
+                "POST",
+                "/alerts",
+                200,
+                data=expiring_data,
+                token=self.admin_token
+            )
+            if success and expiring:
+                time.sleep(4)
+                success, active = self.run_test(
+                    "Get Active Alerts After Expiry",
+                    "GET",
+                    "/alerts",
+                    200,
+                    token=self.admin_token
+                )
+                if success and any(a['id'] == expiring['id'] for a in active):
+                    print("❌ Expired alert is still active")
+            
+            self.run_test(
+                "Create Alert Already Expired (Should Fail)",
+                "POST",
+                "/alerts",
+                400,
+                data={**alert_data, "expires_at": "2020-01-01T00:00:00Z"},
+                token=self.admin_token
+            )
+        
         # NEW: Test teacher can create alerts
         if self.teacher_token:
             teacher_alert_data = {
@@ -324,6 +504,170 @@ class DisasterPreparednessAPITester:
                 token=self.student_token
             )
 
+    def test_quiz_item_analysis(self):
+        """Test per-question item analysis for teachers"""
+        print("\n" + "="*50)
+        print("TESTING QUIZ ITEM ANALYSIS")
+        print("="*50)
+        
+        if not self.teacher_token or not self.student_token:
+            print("❌ Skipping item analysis tests - missing tokens")
+            return
+        
+        questions = [
+            {"question": f"Item Analysis Question {i + 1}", "options": ["A", "B", "C", "D"], "correct": 1}
+            for i in range(3)
+        ]
+        success, quiz = self.run_test(
+            "Create Quiz For Item Analysis",
+            "POST",
+            "/teacher/quizzes",
+            200,
+            data={"title": "Item Analysis Quiz", "questions": questions},
+            token=self.teacher_token
+        )
+        if not success:
+            return
+        
+        for choices in [[1, 1, 1], [1, 0, 2], [1, 1, None]]:
+            self.run_test(
+                "Submit Attempt For Item Analysis",
+                "POST",
+                "/quiz-attempts",
+                200,
+                data={
+                    "quiz_id": quiz['id'],
+                    "module_id": "",
+                    "score": sum(1 for choice in choices if choice == 1),
+                    "total_questions": len(questions),
+                    "answers": [{"user_answer": choice} for choice in choices]
+                },
+                token=self.student_token
+            )
+        
+        success, analysis = self.run_test(
+            "Get Item Analysis",
+            "GET",
+            f"/teacher/quizzes/{quiz['id']}/item-analysis",
+            200,
+            token=self.teacher_token
+        )
+        if success:
+            print(f"  {analysis.get('attempts')} attempts, Cronbach's alpha {analysis.get('cronbach_alpha')}")
+            for item in analysis.get('items', []):
+                print(f"  Q{item['index'] + 1}: difficulty {item['difficulty']}, discrimination {item['discrimination']}, flags {item['flags']}")
+            if analysis.get('attempts') != 3:
+                print(f"❌ Expected 3 attempts in the analysis, got {analysis.get('attempts')}")
+            elif analysis['items'][2]['unanswered'] != 1:
+                print("❌ Unanswered question not counted")
+        
+        # A new attempt must invalidate the cached analysis
+        self.run_test(
+            "Submit Another Attempt",
+            "POST",
+            "/quiz-attempts",
+            200,
+            data={"quiz_id": quiz['id'], "module_id": "", "score": 0, "total_questions": len(questions), "answers": []},
+            token=self.student_token
+        )
+        success, analysis = self.run_test(
+            "Item Analysis After New Attempt",
+            "GET",
+            f"/teacher/quizzes/{quiz['id']}/item-analysis",
+            200,
+            token=self.teacher_token
+        )
+        if success and analysis.get('attempts') != 4:
+            print(f"❌ Cached analysis not refreshed, got {analysis.get('attempts')} attempts")
+        
+        self.run_test(
+            "Student Cannot View Item Analysis",
+            "GET",
+            f"/teacher/quizzes/{quiz['id']}/item-analysis",
+            403,
+            token=self.student_token
+        )
+        self.run_test(
+            "Item Analysis For Unknown Quiz",
+            "GET",
+            "/teacher/quizzes/unknown-quiz/item-analysis",
+            404,
+            token=self.teacher_token
+        )
+        self.run_test(
+            "Delete Item Analysis Quiz",
+            "DELETE",
+            f"/teacher/quizzes/{quiz['id']}",
+            200,
+            token=self.teacher_token
+        )
+
+    def test_alert_receipts(self):
+        """Test alert acknowledgements and receipt summaries"""
+        print("\n" + "="*50)
+        print("TESTING ALERT RECEIPTS")
+        print("="*50)
+        
+        if not self.admin_token or not self.student_token:
+            print("❌ Skipping alert receipt tests - missing tokens")
+            return
+        
+        success, alert = self.run_test(
+            "Create Critical Alert",
+            "POST",
+            "/alerts",
+            200,
+            data={"title": "Receipt Test Alert", "message": "Please acknowledge", "alert_type": "fire", "severity": "critical"},
+            token=self.admin_token
+        )
+        if not success:
+            return
+        
+        # Acknowledging twice is harmless
+        for attempt in ["", " Again"]:
+            self.run_test(
+                f"Student Acknowledges Alert{attempt}",
+                "POST",
+                f"/alerts/{alert['id']}/acknowledge",
+                200,
+                token=self.student_token
+            )
+        
+        success, summary = self.run_test(
+            "Alert Receipt Summary",
+            "GET",
+            f"/alerts/{alert['id']}/receipts",
+            200,
+            token=self.admin_token
+        )
+        if success:
+            print(f"  {summary.get('acknowledged')}/{summary.get('total_students')} students ({summary.get('acknowledgement_rate')}%)")
+        
+        success, missing = self.run_test(
+            "Unacknowledged Students",
+            "GET",
+            f"/alerts/{alert['id']}/receipts/unacknowledged",
+            200,
+            token=self.teacher_token or self.admin_token
+        )
+        if success and any(s['student_id'] == self.student_user['id'] for s in missing):
+            print("❌ Student who acknowledged is listed as unacknowledged")
+        
+        self.run_test(
+            "Student Cannot View Receipts",
+            "GET",
+            f"/alerts/{alert['id']}/receipts",
+            403,
+            token=self.student_token
+        )
+        self.run_test(
+            "Acknowledge Unknown Alert",
+            "POST",
+            "/alerts/does-not-exist/acknowledge",
+            404,
+            token=self.student_token
+        )
+
     def test_emergency_contacts(self):
         """Test emergency contacts endpoints"""
         print("\n" + "="*50)
@@ -347,6 +691,73 @@ class DisasterPreparednessAPITester:
             print(f"Found {len(contacts)} emergency contacts")
             for contact in contacts[:3]:  # Show first 3
                 print(f"  - {contact['name']}: {contact['phone']} ({contact['type']})")
+        
+        # Compact emergency bundle (contacts + active alerts)
+        success, bundle = self.run_test(
+            "Get Emergency Bundle",
+            "GET",
+            "/emergency-bundle",
+            200,
+            token=self.student_token
+        )
+        
+        if success and bundle:
+            print(f"Bundle has {len(bundle['contacts'])} contacts and {len(bundle['alerts'])} alerts")
+            
+            # Revalidating with the ETag should not resend the body
+            headers = {'Authorization': f'Bearer {self.student_token}'}
+            response = requests.get(f"{self.base_url}/emergency-bundle", headers=headers, timeout=10)
+            headers['If-None-Match'] = response.headers.get('ETag', '')
+            self.tests_run += 1
+            print("\n🔍 Testing Emergency Bundle Revalidation...")
+            response = requests.get(f"{self.base_url}/emergency-bundle", headers=headers, timeout=10)
+            if response.status_code == 304:
+                self.tests_passed += 1
+                print("✅ Passed - Status: 304")
+            else:
+                print(f"❌ Failed - Expected 304, got {response.status_code}")
+
+    def test_delta_sync(self):
+        """Test delta sync endpoint"""
+        print("\n" + "="*50)
+        print("TESTING DELTA SYNC")
+        print("="*50)
+        
+        if not self.student_token:
+            print("❌ Skipping delta sync tests - no student token")
+            return
+        
+        # Full sync without a token
+        success, snapshot = self.run_test(
+            "Full Sync",
+            "GET",
+            "/sync",
+            200,
+            token=self.student_token
+        )
+        
+        if success and snapshot:
+            counts = {name: len(docs) for name, docs in snapshot['changed'].items()}
+            print(f"Full sync token {snapshot['token']}: {counts}")
+            
+            # Resync with the token only returns what changed since
+            success, delta = self.run_test(
+                "Delta Sync",
+                "GET",
+                f"/sync?since={snapshot['token']}",
+                200,
+                token=self.student_token
+            )
+            if success and delta:
+                print(f"  Delta: {len(delta['changed'])} changed, {len(delta['deleted'])} deleted collections")
+        
+        self.run_test(
+            "Invalid Sync Token",
+            "GET",
+            "/sync?since=not-a-token",
+            400,
+            token=self.student_token
+        )
 
     def test_disaster_prediction(self):
         """Test disaster prediction endpoints"""
@@ -381,6 +792,35 @@ class DisasterPreparednessAPITester:
             200,
             token=self.student_token
         )
+        
+        # Latest prediction per city
+        success, latest = self.run_test(
+            "Get Latest Predictions per City",
+            "GET",
+            "/predictions/latest",
+            200,
+            token=self.student_token
+        )
+        if success:
+            print(f"  Latest predictions for {len(latest)} cities")
+        
+        success, miami = self.run_test(
+            "Get Latest Prediction for One City",
+            "GET",
+            "/predictions/latest?city=miami",
+            200,
+            token=self.student_token
+        )
+        if success and (len(miami) != 1 or miami[0]['city'].lower() != "miami"):
+            print("❌ Latest prediction lookup returned the wrong city")
+        
+        self.run_test(
+            "Get Latest Prediction for Unknown City",
+            "GET",
+            "/predictions/latest?city=Atlantis",
+            404,
+            token=self.student_token
+        )
 
     def test_modules_and_videos(self):
         """Test modules and video completion functionality"""
@@ -661,6 +1101,70 @@ class DisasterPreparednessAPITester:
                 print(f"    Points: {student['total_points']}, Modules: {student['completed_modules']}/{student['total_modules']}")
                 print(f"    Completion Speed: {student.get('completion_speed', 0)} modules/day")
 
+    def test_class_rosters(self):
+        """Test class rosters and roster-scoped dashboards"""
+        print("\n" + "="*50)
+        print("TESTING CLASS ROSTERS")
+        print("="*50)
+        
+        if not self.teacher_token or not self.student_user:
+            print("❌ Skipping class roster tests - no teacher token or student user")
+            return
+        
+        success, roster = self.run_test(
+            "Teacher Create Class",
+            "POST",
+            "/classes",
+            200,
+            data={"name": f"Test Class {datetime.now().strftime('%H%M%S')}", "student_ids": [self.student_user['id']]},
+            token=self.teacher_token
+        )
+        if not success:
+            return
+        
+        self.run_test(
+            "Teacher List Classes",
+            "GET",
+            "/classes",
+            200,
+            token=self.teacher_token
+        )
+        
+        success, progress = self.run_test(
+            "Class-scoped Students Progress",
+            "GET",
+            f"/teacher/students-progress?class_id={roster['id']}&fields=total_points",
+            200,
+            token=self.teacher_token
+        )
+        if success:
+            print(f"  Students in class: {progress['class_statistics']['total_students']}")
+        
+        self.run_test(
+            "Class-scoped Leaderboard",
+            "GET",
+            f"/leaderboard?class_id={roster['id']}",
+            200,
+            token=self.student_token
+        )
+        
+        self.run_test(
+            "Add Unknown Student (Should Fail)",
+            "PUT",
+            f"/classes/{roster['id']}/students",
+            400,
+            data={"add": ["not-a-student"]},
+            token=self.teacher_token
+        )
+        
+        self.run_test(
+            "Delete Class",
+            "DELETE",
+            f"/classes/{roster['id']}",
+            200,
+            token=self.teacher_token
+        )
+
     def test_admin_teacher_progress(self):
         """Test admin teacher progress tracking"""
         print("\n" + "="*50)
@@ -745,6 +1249,214 @@ class DisasterPreparednessAPITester:
                     quiz_status = "✅" if progress.get('quiz_completed') else "❌"
                     quiz_score = f"({progress.get('quiz_score', 0)}/{progress.get('quiz_total', 0)})" if progress.get('quiz_completed') else ""
                     print(f"    {progress['module_title']}: Video {video_status}, Quiz {quiz_status} {quiz_score}")
+        
+        # Sparse fieldset: only the requested totals come back
+        success, totals = self.run_test(
+            "Get Student Statistics (Totals Only)",
+            "GET",
+            f"/user-stats/{self.student_user['id']}?fields=total_points,total_quizzes_completed",
+            200,
+            token=self.student_token
+        )
+        if success and totals:
+            print(f"  Returned fields: {sorted(totals.keys())}")
+            if 'module_progress' in totals:
+                print("❌ module_progress should have been pruned")
+        
+        self.run_test(
+            "Get Student Statistics (Unknown Field)",
+            "GET",
+            f"/user-stats/{self.student_user['id']}?fields=not_a_field",
+            400,
+            token=self.student_token
+        )
+
+    def test_batch_requests(self):
+        """Test multiplexed batch API"""
+        print("\n" + "="*50)
+        print("TESTING BATCH REQUESTS")
+        print("="*50)
+        
+        if not self.student_token or not self.student_user:
+            print("❌ Skipping batch tests - no student token/user")
+            return
+        
+        success, batch = self.run_test(
+            "Student Home Batch",
+            "POST",
+            "/batch",
+            200,
+            data={"requests": [
+                {"id": "me", "path": "/api/auth/me"},
+                {"id": "modules", "path": "/api/modules"},
+                {"id": "alerts", "path": "/api/alerts"},
+                {"id": "stats", "path": f"/api/user-stats/{self.student_user['id']}"},
+                {"id": "leaderboard", "path": "/api/leaderboard"},
+                {"id": "users", "path": "/api/users"}
+            ]},
+            token=self.student_token
+        )
+        if success and batch:
+            statuses = {r['id']: r['status'] for r in batch.get('responses', [])}
+            print(f"  Sub-request statuses: {statuses}")
+            # Per-sub-request status codes are preserved: students may not list users
+            if statuses.get('users') != 403:
+                print("❌ Expected 403 for /api/users inside the batch")
+
+    def test_report_jobs(self):
+        """Test asynchronous report jobs"""
+        print("\n" + "="*50)
+        print("TESTING REPORT JOBS")
+        print("="*50)
+        
+        if not self.teacher_token:
+            print("❌ Skipping report job tests - no teacher token")
+            return
+        
+        success, job = self.run_test(
+            "Submit Students Progress Report (Teacher)",
+            "POST",
+            "/reports",
+            202,
+            data={"report_type": "students-progress"},
+            token=self.teacher_token
+        )
+        if not success or not job:
+            return
+        print(f"  Job {job['id']} is {job['status']}")
+        
+        # Identical requests reuse the pending or finished job
+        success, again = self.run_test(
+            "Resubmit Identical Report (Teacher)",
+            "POST",
+            "/reports",
+            202,
+            data={"report_type": "students-progress"},
+            token=self.teacher_token
+        )
+        if success and again:
+            print(f"  Reused existing job: {again['id'] == job['id']}")
+        
+        for _ in range(10):
+            success, status = self.run_test(
+                "Poll Report Status (Teacher)",
+                "GET",
+                f"/reports/{job['id']}",
+                200,
+                token=self.teacher_token
+            )
+            if not success or status.get('status') in ('completed', 'failed'):
+                break
+            time.sleep(1)
+        
+        self.run_test(
+            "Fetch Report Result (Teacher)",
+            "GET",
+            f"/reports/{job['id']}/result",
+            200,
+            token=self.teacher_token
+        )
+        
+        if self.student_token:
+            self.run_test(
+                "Submit Teachers Progress Report (Student - Should Fail)",
+                "POST",
+                "/reports",
+                403,
+                data={"report_type": "teachers-progress"},
+                token=self.student_token
+            )
+
+    def test_diagnostics(self):
+        """Test admin-only diagnostics endpoints"""
+        print("\n" + "="*50)
+        print("TESTING DIAGNOSTICS")
+        print("="*50)
+        
+        if not self.admin_token:
+            print("❌ Skipping diagnostics tests - no admin token")
+            return
+        
+        # Short collapsed-stack profile of the worker
+        self.run_test(
+            "Sampling Profile (Admin)",
+            "GET",
+            "/admin/profile?seconds=1",
+            200,
+            token=self.admin_token
+        )
+        
+        success, profile = self.run_test(
+            "Sampling Profile Speedscope (Admin)",
+            "GET",
+            "/admin/profile?seconds=1&format=speedscope",
+            200,
+            token=self.admin_token
+        )
+        if success and profile:
+            print(f"  Profiled threads: {[p['name'] for p in profile.get('profiles', [])]}")
+        
+        success, stalls = self.run_test(
+            "Event Loop Stalls (Admin)",
+            "GET",
+            "/admin/event-loop/stalls",
+            200,
+            token=self.admin_token
+        )
+        if success and stalls:
+            print(f"  Recorded stalls: {len(stalls.get('stalls', []))} (threshold {stalls.get('threshold_ms')} ms)")
+        
+        # Memory snapshots need tracing switched on first
+        self.run_test(
+            "Enable Memory Tracing (Admin)",
+            "POST",
+            "/admin/memory/tracing",
+            200,
+            data={"enabled": True},
+            token=self.admin_token
+        )
+        success, snapshot = self.run_test(
+            "Memory Snapshot (Admin)",
+            "GET",
+            "/admin/memory/snapshot?limit=5",
+            200,
+            token=self.admin_token
+        )
+        if success and snapshot:
+            for site in snapshot.get('top_allocations', []):
+                print(f"  {site['site']}: {site['size_bytes']} bytes")
+        self.run_test(
+            "Disable Memory Tracing (Admin)",
+            "POST",
+            "/admin/memory/tracing",
+            200,
+            data={"enabled": False},
+            token=self.admin_token
+        )
+        
+        self.run_test(
+            "Metrics Export (Admin)",
+            "GET",
+            "/admin/metrics",
+            200,
+            token=self.admin_token
+        )
+        
+        if self.student_token:
+            self.run_test(
+                "Metrics Export (Student - Should Fail)",
+                "GET",
+                "/admin/metrics",
+                403,
+                token=self.student_token
+            )
+            self.run_test(
+                "Sampling Profile (Student - Should Fail)",
+                "GET",
+                "/admin/profile?seconds=1",
+                403,
+                token=self.student_token
+            )
 
 def main():
     print("🚀 Starting Disaster Preparedness API Testing")
@@ -753,19 +1465,28 @@ def main():
     tester = DisasterPreparednessAPITester()
     
     # Run all tests
+    tester.test_health_probes()  # NEW: Liveness/readiness probes
     tester.test_authentication()
     tester.test_user_management()
+    tester.test_tenant_isolation()  # NEW: Multi-tenant partitioning
     tester.test_modules_and_videos()
     tester.test_quiz_system()
     tester.test_quiz_management_teachers()  # NEW: Teacher quiz management
+    tester.test_quiz_item_analysis()  # NEW: Quiz item analysis
     tester.test_drill_system()
     tester.test_alert_system()  # Updated with teacher alert creation
+    tester.test_alert_receipts()  # NEW: Alert acknowledgement receipts
     tester.test_emergency_contacts()
+    tester.test_delta_sync()  # NEW: Delta sync
     tester.test_disaster_prediction()
     tester.test_leaderboard_system()  # NEW: Leaderboard and ranking
     tester.test_teacher_dashboard()  # Updated with ranking
+    tester.test_class_rosters()  # NEW: Class rosters
     tester.test_admin_teacher_progress()  # NEW: Admin teacher progress
     tester.test_user_stats()
+    tester.test_report_jobs()  # NEW: Background report jobs
+    tester.test_batch_requests()  # NEW: Batch API
+    tester.test_diagnostics()  # NEW: Admin diagnostics
     
     # Print final results
     print("\n" + "="*60)
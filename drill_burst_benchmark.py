@@ -0,0 +1,125 @@
+import argparse
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+class DrillBurstBenchmark:
+    """Simulates a school-wide evacuation drill hitting the check-in endpoint at once"""
+
+    def __init__(self, base_url, username, password, concurrency):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.concurrency = concurrency
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.headers = {}
+
+    def login(self):
+        response = self.session.post(
+            f"{self.base_url}/auth/login",
+            json={"username": self.username, "password": self.password},
+            timeout=10
+        )
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def check_in(self, drill_id, key):
+        # Every check-in carries its own key, so one account can stand in for a whole school
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/drills/check-in",
+                json={"drill_id": drill_id, "drill_type": "fire"},
+                headers={**self.headers, "Idempotency-Key": key},
+                timeout=30
+            )
+            status = response.status_code
+            replayed = response.headers.get("Idempotent-Replayed") == "true"
+        except requests.RequestException:
+            status, replayed = None, False
+        return time.perf_counter() - started, status, replayed
+
+    def legacy_record(self, drill_id, key):
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/drills",
+                json={"drill_type": "fire", "notes": f"{drill_id}:{key}"},
+                headers=self.headers,
+                timeout=30
+            )
+            status = response.status_code
+        except requests.RequestException:
+            status = None
+        return time.perf_counter() - started, status, False
+
+    def run(self, name, call, students, duplicate_ratio):
+        drill_id = f"bench-{uuid.uuid4()}"
+        keys = [f"{drill_id}:student-{i}" for i in range(students)]
+        # Retried requests reuse an earlier key, as a client would after a timeout
+        keys += keys[:int(students * duplicate_ratio)]
+
+        print(f"\n🔍 {name}: {len(keys)} requests ({students} students), concurrency {self.concurrency}")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(lambda key: call(drill_id, key), keys))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _, _ in results)
+        errors = sum(1 for _, status, _ in results if status != 200)
+        replayed = sum(1 for _, _, was_replayed in results if was_replayed)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        print(f"  Throughput: {len(results) / elapsed:.0f} req/s over {elapsed:.2f}s")
+        print(f"  Latency ms: p50 {percentile(0.5):.1f}, p95 {percentile(0.95):.1f}, p99 {percentile(0.99):.1f}, max {latencies[-1] * 1000:.1f}")
+        print(f"  Errors: {errors}, replayed duplicates: {replayed}")
+        return drill_id, errors
+
+    def verify_count(self, drill_id, expected):
+        response = self.session.get(f"{self.base_url}/drills/{drill_id}/count", headers=self.headers, timeout=10)
+        if response.status_code != 200:
+            print(f"  Live counter not readable with this account (status {response.status_code})")
+            return True
+        count = response.json()["count"]
+        if count == expected:
+            print(f"✅ Live counter: {count} check-ins")
+            return True
+        print(f"❌ Live counter: expected {expected}, got {count}")
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Burst benchmark for POST /api/drills/check-in")
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Share of requests that are retries")
+    parser.add_argument("--compare-legacy", action="store_true", help="Also run the burst against POST /api/drills")
+    args = parser.parse_args()
+
+    benchmark = DrillBurstBenchmark(args.base_url, args.username, args.password, args.concurrency)
+    benchmark.login()
+
+    drill_id, errors = benchmark.run("Check-in endpoint", benchmark.check_in, args.students, args.duplicates)
+    ok = errors == 0 and benchmark.verify_count(drill_id, args.students)
+
+    if args.compare_legacy:
+        _, legacy_errors = benchmark.run("Legacy POST /drills", benchmark.legacy_record, args.students, args.duplicates)
+        print(f"  Legacy endpoint stored every retry as a new participation ({legacy_errors} errors)")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
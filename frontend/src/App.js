@@ -112,7 +112,7 @@ const QuizManager = ({ user, onRefresh }) => {
 
   const loadQuizzes = async () => {
     try {
-      const response = await axios.get('/teacher/quizzes');
+      const response = await axios.get('/teacher/quizzes/summary');
       setQuizzes(response.data);
     } catch (error) {
       toast.error('Error loading quizzes');
@@ -202,14 +202,20 @@ const QuizManager = ({ user, onRefresh }) => {
     }
   };
 
-  const startEdit = (quiz) => {
-    setEditingQuiz(quiz);
-    setNewQuiz({
-      title: quiz.title,
-      module_id: quiz.module_id,
-      questions: quiz.questions
-    });
-    setIsCreateDialogOpen(true);
+  const startEdit = async (quiz) => {
+    try {
+      // The list only carries summaries; load the questions when editing
+      const response = await axios.get(`/quizzes/${quiz.id}`);
+      setEditingQuiz(response.data);
+      setNewQuiz({
+        title: response.data.title,
+        module_id: response.data.module_id,
+        questions: response.data.questions
+      });
+      setIsCreateDialogOpen(true);
+    } catch (error) {
+      toast.error('Error loading quiz');
+    }
   };
 
   return (
@@ -365,7 +371,7 @@ const QuizManager = ({ user, onRefresh }) => {
                 <div className="flex-1">
                   <h3 className="text-lg font-semibold text-gray-900">{quiz.title}</h3>
                   <div className="flex items-center space-x-4 text-sm text-gray-600 mt-1">
-                    <span>{quiz.questions.length} questions</span>
+                    <span>{quiz.question_count} questions</span>
                     <span>
                       {quiz.module_id 
                         ? `Module: ${modules.find(m => m.id === quiz.module_id)?.title || 'Unknown'}` 
@@ -896,6 +902,7 @@ const LoginPage = ({ onLogin, onBackToHome }) => {
 const Dashboard = ({ user, onLogout }) => {
   const [activeTab, setActiveTab] = useState('dashboard');
   const [alerts, setAlerts] = useState([]);
+  const [acknowledgedAlerts, setAcknowledgedAlerts] = useState([]);
   const [userStats, setUserStats] = useState(null);
   const [emergencyContacts, setEmergencyContacts] = useState([]);
   const [users, setUsers] = useState([]);
@@ -920,52 +927,72 @@ const Dashboard = ({ user, onLogout }) => {
   }, []);
 
   const loadDashboardData = async () => {
-    try {
-      // Load alerts
-      const alertsResponse = await axios.get('/alerts');
-      setAlerts(alertsResponse.data);
+    // Alerts and emergency contacts stay on their own requests so they keep the critical lane
+    const loadCritical = async () => {
+      try {
+        const [alertsResponse, contactsResponse] = await Promise.all([
+          axios.get('/alerts'),
+          axios.get('/emergency-contacts')
+        ]);
+        setAlerts(alertsResponse.data);
+        setEmergencyContacts(contactsResponse.data);
+      } catch (error) {
+        console.error('Error loading alerts and contacts:', error);
+        toast.error('Error loading alerts and emergency contacts');
+      }
+    };
 
-      // Load user stats (only for students)
+    // Everything else arrives in one round trip; each result is applied on its own
+    const loadBatched = async () => {
+      const requests = [{ id: 'predictions', path: '/api/predictions' }];
+      // Load user stats and modules (only for students)
       if (user.role === 'student') {
-        const statsResponse = await axios.get(`/user-stats/${user.id}`);
-        setUserStats(statsResponse.data);
+        requests.push({ id: 'stats', path: `/api/user-stats/${user.id}` });
+        requests.push({ id: 'modules', path: '/api/modules' });
       }
-
-      // Load emergency contacts
-      const contactsResponse = await axios.get('/emergency-contacts');
-      setEmergencyContacts(contactsResponse.data);
-
-      // Load users (admin only)
+      // Load users and teachers progress (admin only)
       if (user.role === 'admin') {
-        const usersResponse = await axios.get('/users');
-        setUsers(usersResponse.data);
-        
-        // Load teachers progress for admin
-        const teachersResponse = await axios.get('/admin/teachers-progress');
-        setTeachersProgress(teachersResponse.data.teachers_progress);
+        requests.push({ id: 'users', path: '/api/users' });
+        requests.push({ id: 'teachers', path: '/api/admin/teachers-progress' });
       }
-
-      // Load modules (only for students)
-      if (user.role === 'student') {
-        const modulesResponse = await axios.get('/modules');
-        setModules(modulesResponse.data);
+      // Load students progress for teachers and admin
+      if (user.role === 'teacher' || user.role === 'admin') {
+        requests.push({ id: 'progress', path: '/api/teacher/students-progress' });
       }
 
-      // Load predictions
-      const predictionsResponse = await axios.get('/predictions');
-      setPredictions(predictionsResponse.data);
+      const apply = {
+        predictions: (body) => setPredictions(body),
+        stats: (body) => setUserStats(body),
+        modules: (body) => setModules(body),
+        users: (body) => setUsers(body),
+        teachers: (body) => setTeachersProgress(body.teachers_progress),
+        progress: (body) => {
+          setStudentsProgress(body.students_progress);
+          setClassStats(body.class_statistics);
+        }
+      };
 
-      // Load students progress for teachers and admin
-      if (user.role === 'teacher' || user.role === 'admin') {
-        const progressResponse = await axios.get('/teacher/students-progress');
-        setStudentsProgress(progressResponse.data.students_progress);
-        setClassStats(progressResponse.data.class_statistics);
+      try {
+        const response = await axios.post('/batch', { requests });
+        const failed = [];
+        response.data.responses.forEach((result) => {
+          if (result.status >= 400) {
+            failed.push(result.id);
+          } else {
+            apply[result.id](result.body);
+          }
+        });
+        if (failed.length > 0) {
+          console.error('Dashboard requests failed:', failed);
+          toast.error('Some dashboard data could not be loaded');
+        }
+      } catch (error) {
+        console.error('Error loading dashboard data:', error);
+        toast.error('Error loading dashboard data');
       }
+    };
 
-    } catch (error) {
-      console.error('Error loading dashboard data:', error);
-      toast.error('Error loading dashboard data');
-    }
+    await Promise.all([loadCritical(), loadBatched()]);
   };
 
   const handleVideoComplete = async (moduleId) => {
@@ -1054,6 +1081,15 @@ const Dashboard = ({ user, onLogout }) => {
     }
   };
 
+  const handleAcknowledgeAlert = async (alertId) => {
+    try {
+      await axios.post(`/alerts/${alertId}/acknowledge`);
+      setAcknowledgedAlerts(prev => [...prev, alertId]);
+    } catch (error) {
+      toast.error('Error acknowledging alert');
+    }
+  };
+
   const handlePredictDisaster = async (e) => {
     e.preventDefault();
     if (!predictionCity.trim()) return;
@@ -1405,6 +1441,15 @@ const Dashboard = ({ user, onLogout }) => {
                             </span>
                           </div>
                         </div>
+                        {user.role === 'student' && (
+                          acknowledgedAlerts.includes(alert.id) ? (
+                            <Badge variant="outline">Acknowledged</Badge>
+                          ) : (
+                            <Button onClick={() => handleAcknowledgeAlert(alert.id)} variant="outline" size="sm">
+                              Got it
+                            </Button>
+                          )
+                        )}
                       </div>
                     </Alert>
                   ))}
@@ -1823,6 +1868,15 @@ const Dashboard = ({ user, onLogout }) => {
                             </span>
                           </div>
                         </div>
+                        {user.role === 'student' && (
+                          acknowledgedAlerts.includes(alert.id) ? (
+                            <Badge variant="outline">Acknowledged</Badge>
+                          ) : (
+                            <Button onClick={() => handleAcknowledgeAlert(alert.id)} variant="outline" size="sm">
+                              Got it
+                            </Button>
+                          )
+                        )}
                       </div>
                     </Alert>
                   ))
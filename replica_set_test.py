@@ -0,0 +1,199 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+from pymongo import MongoClient
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+DASHBOARD_ROUTES = ["/teacher/students-progress", "/admin/teachers-progress", "/leaderboard", "/predictions"]
+DASHBOARD_COLLECTIONS = {"quiz_attempts", "video_completions", "disaster_predictions"}
+
+
+class LocalReplicaSet:
+    """Three mongod processes on localhost joined into one replica set"""
+
+    def __init__(self, mongod, ports, name="rs0"):
+        self.mongod = mongod
+        self.ports = ports
+        self.name = name
+        self.processes = []
+        self.data_dir = None
+
+    @property
+    def url(self):
+        hosts = ",".join(f"127.0.0.1:{port}" for port in self.ports)
+        return f"mongodb://{hosts}/?replicaSet={self.name}"
+
+    def start(self):
+        self.data_dir = tempfile.mkdtemp(prefix="replica-set-test-")
+        for port in self.ports:
+            db_path = os.path.join(self.data_dir, str(port))
+            os.makedirs(db_path)
+            self.processes.append(subprocess.Popen(
+                [self.mongod, "--replSet", self.name, "--port", str(port), "--dbpath", db_path,
+                 "--bind_ip", "127.0.0.1", "--logpath", os.path.join(db_path, "mongod.log")],
+                stdout=subprocess.DEVNULL
+            ))
+        seed = MongoClient(port=self.ports[0], directConnection=True, serverSelectionTimeoutMS=30000)
+        seed.admin.command("replSetInitiate", {
+            "_id": self.name,
+            "members": [{"_id": i, "host": f"127.0.0.1:{port}"} for i, port in enumerate(self.ports)]
+        })
+        seed.close()
+        self.wait_healthy()
+
+    def wait_healthy(self, timeout=60):
+        deadline = time.time() + timeout
+        with MongoClient(port=self.ports[0], directConnection=True) as seed:
+            while time.time() < deadline:
+                states = [member["stateStr"] for member in seed.admin.command("replSetGetStatus")["members"]]
+                if sorted(states) == ["PRIMARY", "SECONDARY", "SECONDARY"]:
+                    return
+                time.sleep(0.5)
+        raise RuntimeError("Replica set did not elect a primary with two secondaries in time")
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.wait(timeout=30)
+        if self.data_dir:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+class ReadRoutingTest:
+    """Checks that dashboards read from secondaries while auth and writes stay on the primary"""
+
+    def __init__(self, mongo_url, db_name, base_url):
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.base_url = base_url
+        self.nodes = {}
+        self.failures = 0
+
+    def connect_nodes(self):
+        with MongoClient(self.mongo_url) as cluster:
+            hosts = cluster.admin.command("hello")["hosts"]
+        for host in hosts:
+            node = MongoClient(host, directConnection=True)
+            role = "primary" if node.admin.command("hello")["isWritablePrimary"] else "secondary"
+            self.nodes[host] = (role, node)
+        print(f"  Nodes: {', '.join(f'{host} ({role})' for host, (role, _) in self.nodes.items())}")
+
+    def enable_profiling(self):
+        for _, node in self.nodes.values():
+            node[self.db_name].command("profile", 0)
+            node[self.db_name].system.profile.drop()
+            node[self.db_name].command("profile", 2)
+
+    def profiled_ops(self, since):
+        # Every read and write the backend sent, tagged with the role of the node that served it
+        ops = []
+        for role, node in self.nodes.values():
+            for entry in node[self.db_name].system.profile.find({"ts": {"$gte": since}}):
+                collection = entry.get("ns", "").split(".", 1)[-1]
+                ops.append((role, entry.get("op"), collection, entry.get("command", {})))
+        return ops
+
+    def check(self, name, passed, detail=""):
+        print(f"{'✅' if passed else '❌'} {name}{f' - {detail}' if detail and not passed else ''}")
+        if not passed:
+            self.failures += 1
+
+    def run(self, username, password):
+        self.connect_nodes()
+        self.enable_profiling()
+        since = datetime.now(timezone.utc)
+
+        response = requests.post(f"{self.base_url}/auth/login", json={"username": username, "password": password}, timeout=30)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for route in DASHBOARD_ROUTES:
+            response = requests.get(f"{self.base_url}{route}", headers=headers, timeout=30)
+            self.check(f"GET {route}", response.status_code == 200, f"status {response.status_code}")
+        response = requests.post(f"{self.base_url}/drills", json={"drill_type": "fire", "notes": "replica set test"}, headers=headers, timeout=30)
+        self.check("POST /drills", response.status_code == 200, f"status {response.status_code}")
+
+        # The profiler writes entries asynchronously on secondaries
+        time.sleep(1)
+        ops = self.profiled_ops(since)
+        dashboard_reads = [(role, collection) for role, op, collection, _ in ops
+                           if collection in DASHBOARD_COLLECTIONS and op in ("query", "command")]
+        auth_reads = [role for role, op, collection, command in ops
+                      if collection == "users" and op == "query" and "username" in command.get("filter", {})]
+        drill_writes = [role for role, op, collection, _ in ops if collection == "drill_participations" and op == "insert"]
+
+        self.check("Dashboard reads served by secondaries",
+                   dashboard_reads and all(role == "secondary" for role, _ in dashboard_reads), f"{dashboard_reads}")
+        self.check("Auth lookups served by the primary", auth_reads and set(auth_reads) == {"primary"}, f"{auth_reads}")
+        self.check("Writes go to the primary", drill_writes == ["primary"], f"{drill_writes}")
+
+        for _, node in self.nodes.values():
+            node[self.db_name].command("profile", 0)
+            node.close()
+        return self.failures == 0
+
+
+def wait_for_backend(base_url, process, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Backend exited during startup")
+        try:
+            if requests.get(f"{base_url}/health/ready", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("Backend did not become ready in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-preference routing test against a local three-node replica set")
+    parser.add_argument("--mongo-url", help="Existing replica set to test against; omit to start one with --mongod")
+    parser.add_argument("--mongod", default=shutil.which("mongod"), help="mongod binary used to start a throwaway replica set")
+    parser.add_argument("--ports", default="27117,27118,27119")
+    parser.add_argument("--db-name", default="replica_set_test")
+    parser.add_argument("--backend-port", type=int, default=8011)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    args = parser.parse_args()
+
+    replica_set = None
+    mongo_url = args.mongo_url
+    if not mongo_url:
+        if not args.mongod:
+            parser.error("mongod not found on PATH; pass --mongod or --mongo-url")
+        print("🔍 Starting a local three-node replica set")
+        replica_set = LocalReplicaSet(args.mongod, [int(port) for port in args.ports.split(",")])
+        replica_set.start()
+        mongo_url = replica_set.url
+
+    base_url = f"http://127.0.0.1:{args.backend_port}/api"
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.backend_port)],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "MONGO_URL": mongo_url, "DB_NAME": args.db_name, "SNAPSHOT_PATH": ""}
+    )
+    try:
+        wait_for_backend(base_url, backend)
+        print("🔍 Checking where each query was served")
+        ok = ReadRoutingTest(mongo_url, args.db_name, base_url).run(args.username, args.password)
+    finally:
+        backend.terminate()
+        backend.wait(timeout=30)
+        if replica_set:
+            replica_set.stop()
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())